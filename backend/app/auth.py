@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,9 +10,22 @@ from prisma.models import User
 from . import schemas
 from .database import get_db
 from .config import settings
+from .cache import TTLCache
+from .hashing import HashingPool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+hashing_pool = HashingPool(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+    settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+)
+
+# Decoded claims keyed by the raw token, and user records keyed by the token
+# subject (email), so authenticated requests skip the JWT verify and the user
+# lookup in the common case.
+token_claims_cache = TTLCache(settings.AUTH_TOKEN_CACHE_TTL_SECONDS, settings.AUTH_TOKEN_CACHE_MAX_ENTRIES)
+user_cache = TTLCache(settings.AUTH_USER_CACHE_TTL_SECONDS, settings.AUTH_USER_CACHE_MAX_ENTRIES)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,6 +33,12 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await hashing_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -36,6 +56,25 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def invalidate_user(email: str):
+    """Drop the cached record for ``email``; call after any change to the user."""
+    user_cache.pop(email)
+
+def decode_token(token: str) -> dict:
+    """Verify and decode ``token``, reusing cached claims for tokens seen recently."""
+    payload = token_claims_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    # Never keep claims around past the token's own expiry
+    ttl = token_claims_cache.ttl
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_claims_cache.set(token, payload, ttl=ttl)
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Prisma = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,14 +82,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Prisma = Dep
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
+    user = user_cache.get(token_data.email)
+    if user is not None:
+        return user
+
     user = await db.user.find_unique(where={"email": token_data.email})
     if user is None:
         raise credentials_exception
+    user_cache.set(token_data.email, user)
     return user 
\ No newline at end of file
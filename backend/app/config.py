@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -8,6 +8,53 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_DAYS: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
+    # Authenticated user / decoded token caches (TTL 0 disables)
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 4096
+
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    PASSWORD_HASH_STATS_INTERVAL_SECONDS: float = 60.0  # Queue-wait log line period (0 disables)
+
+    # Encode responses with orjson when it is installed
+    FAST_JSON: bool = True
+
+    # Cache-Control sent alongside the ETag of search results and bookmark pages
+    SEARCH_CACHE_CONTROL: str = "private, max-age=300"
+    EMPTY_SEARCH_CACHE_CONTROL: str = "no-store"  # An empty result is usually a failed crawl
+    BOOKMARKS_CACHE_CONTROL: str = "private, no-cache"
+
+    # GET /bookmarks page size
+    BOOKMARKS_PAGE_SIZE: int = 50
+    BOOKMARKS_MAX_PAGE_SIZE: int = 200
+
+    # Worker processes running the spiders (each with its own browser pool)
+    CRAWL_WORKERS: int = 2
+
+    # Background search jobs (/search/jobs); finished jobs are kept for the retention period
+    SEARCH_JOB_TIMEOUT_SECONDS: int = 600
+    SEARCH_JOB_RETENTION_SECONDS: int = 3600
+    SEARCH_JOB_MAX_ENTRIES: int = 1000
+
+    # Search result cache
+    SEARCH_CACHE_TTL_SECONDS: int = 900
+    SEARCH_CACHE_MAX_ENTRIES: int = 256
+
+    # Background pre-crawl of popular cities (disabled while the list is empty),
+    # e.g. PRECRAWL_CITIES='["Dhaka", "Chittagong", "Cox's Bazar"]'
+    PRECRAWL_CITIES: List[str] = []
+    PRECRAWL_NIGHTS_AHEAD: int = 1
+    PRECRAWL_INTERVAL_SECONDS: int = 600
+    PRECRAWL_CONCURRENCY: int = 1
+
+    # Scraped price history (hotel_price_snapshots)
+    SNAPSHOTS_ENABLED: bool = True
+    SNAPSHOT_BATCH_SIZE: int = 500
+
     class Config:
         env_file = ".env"
 
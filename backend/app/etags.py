@@ -0,0 +1,47 @@
+import hashlib
+from typing import Any, Dict
+
+from fastapi import Request, Response
+
+from .serialization import EncodedJSON
+
+def version_etag(*parts: Any) -> str:
+    """Weak ETag derived from a version marker rather than the body itself."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of ``etag`` against the request's If-None-Match list."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
+
+def precondition_failed(etag: str) -> Response:
+    return Response(status_code=412, headers={"ETag": etag})
+
+def encoded_response(request: Request, encoded: EncodedJSON, cache_control: str) -> Response:
+    """
+    Send an already-encoded payload, or a bodiless 304 when the client's
+    If-None-Match already has it. For methods other than GET and HEAD a
+    matching If-None-Match is a failed precondition (RFC 9110, 13.1.2).
+    """
+    if etag_matches(request, encoded.etag):
+        if request.method not in ("GET", "HEAD"):
+            return precondition_failed(encoded.etag)
+        return not_modified(encoded.etag, cache_control)
+    return Response(
+        encoded.body,
+        media_type="application/json",
+        headers=cache_headers(encoded.etag, cache_control),
+    )
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class HashingPoolBusy(Exception):
+    """Raised when a password hash could not get a worker in time."""
+
+class HashingPool:
+    """
+    Runs password hashing/verification on a small dedicated thread pool.
+
+    bcrypt releases the GIL, so the event loop keeps serving other requests
+    while a hash is computed. At most ``workers`` hashes run at once; up to
+    ``max_pending`` more callers queue for a worker for at most
+    ``queue_timeout`` seconds, anything beyond that is rejected with
+    HashingPoolBusy so a login storm sheds load instead of piling up.
+    """
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self._window_wait_max = 0.0
+        self._reported: Dict[str, float] = dict(self.stats(), queue_wait_total=0.0)
+        self._report_task: Optional[asyncio.Task] = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+
+        if self._in_flight >= self.workers + self.max_pending:
+            self._reject("queue full")
+
+        self._in_flight += 1
+        try:
+            queued_at = time.monotonic()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject(f"waited {self.queue_timeout:.1f}s")
+
+            waited = time.monotonic() - queued_at
+            self.admitted += 1
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+            self._window_wait_max = max(self._window_wait_max, waited)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            finally:
+                self._slots.release()
+        finally:
+            self._in_flight -= 1
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        logger.warning(f"Password hashing pool busy ({reason}), rejecting request")
+        raise HashingPoolBusy(reason)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue wait and throughput counters since startup."""
+        return {
+            "in_flight": self._in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / self.admitted if self.admitted else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+        }
+
+    def report(self):
+        """Log admissions, rejections and queue waits since the previous report, if any."""
+        current = self.stats()
+        admitted = current["admitted"] - self._reported["admitted"]
+        rejected = current["rejected"] - self._reported["rejected"]
+        if admitted or rejected:
+            waited = self.queue_wait_total - self._reported["queue_wait_total"]
+            logger.info(
+                f"Password hashing: {admitted} admitted, {rejected} rejected, "
+                f"queue wait avg {waited / admitted if admitted else 0.0:.3f}s "
+                f"max {self._window_wait_max:.3f}s, {current['in_flight']} in flight"
+            )
+        self._reported = dict(current, queue_wait_total=self.queue_wait_total)
+        self._window_wait_max = 0.0
+
+    async def _report_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.report()
+
+    def start_reporting(self, interval: float):
+        """Log ``report()`` every ``interval`` seconds (0 disables)."""
+        if self._report_task is None and interval > 0:
+            self._report_task = asyncio.ensure_future(self._report_forever(interval))
+
+    def close(self):
+        if self._report_task is not None:
+            self._report_task.cancel()
+            self._report_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
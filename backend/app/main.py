@@ -1,17 +1,36 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from prisma import Prisma
-from . import schemas, auth
-from .database import get_db, connect, disconnect
+from pydantic import ValidationError
+from . import schemas, auth, etags, pagination
+from .database import get_db, connect, disconnect, prisma
+from .config import settings
+from .cache import TTLCache, SingleFlight
+from .hashing import HashingPoolBusy
+from .serialization import EncodedJSON, FastJSONResponse, dumps, encode_json, json_response
+from .precrawl import PrecrawlScheduler
+from .search_jobs import SearchJobManager
+from .snapshots import save_snapshots_in_background
 from prisma.models import User, Bookmark
-from .scraper.runner import ScrapySearchService 
-from typing import List
-from crochet._eventloop import TimeoutError
+from .scraper.runner import ScrapySearchService, search_cache_key
+from .scraper.settings import MAX_RESULT_PAGES
+from datetime import date
+from typing import List, Optional
 from comparator import group_hotels_by_name, organize_hotel_comparison
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# Crawls run in separate worker processes; this is only their client
+scrapy_service = ScrapySearchService(settings.CRAWL_WORKERS)
 
-scrapy_service = ScrapySearchService()
+# Comparison results keyed by resolved search parameters; identical searches
+# running at the same time share a single crawl
+search_cache = TTLCache(settings.SEARCH_CACHE_TTL_SECONDS, settings.SEARCH_CACHE_MAX_ENTRIES)
+search_flights = SingleFlight()
 
 # CORS middleware configuration
 app.add_middleware(
@@ -20,6 +39,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser code read the bookmark page cursor and validators
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 @app.get("/")
@@ -29,10 +50,25 @@ async def root():
 @app.on_event("startup")
 async def startup():
     await connect()
+    # Crawl workers warm their own browsers once they are up
+    scrapy_service.start()
+    precrawl_scheduler.start()
+    auth.hashing_pool.start_reporting(settings.PASSWORD_HASH_STATS_INTERVAL_SECONDS)
 
 @app.on_event("shutdown")
 async def shutdown():
+    await precrawl_scheduler.stop()
+    await search_jobs.stop()
     await disconnect()
+    auth.hashing_pool.close()
+    await asyncio.get_running_loop().run_in_executor(None, scrapy_service.stop)
+
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, please retry shortly",
+        headers={"Retry-After": str(max(1, round(settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)))},
+    )
 
 @app.post("/register", response_model=schemas.User)
 async def register(user: schemas.UserCreate, db: Prisma = Depends(get_db)):
@@ -40,7 +76,10 @@ async def register(user: schemas.UserCreate, db: Prisma = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = auth.get_password_hash(user.password)
+    try:
+        hashed_password = await auth.get_password_hash_async(user.password)
+    except HashingPoolBusy:
+        raise password_pool_busy()
     new_user = await db.user.create(
         data={
             "email": user.email,
@@ -48,12 +87,17 @@ async def register(user: schemas.UserCreate, db: Prisma = Depends(get_db)):
             "password": hashed_password
         }
     )
+    auth.invalidate_user(new_user.email)
     return new_user
 
 @app.post("/login", response_model=schemas.Token)
 async def login(user: schemas.LoginSchema, db: Prisma = Depends(get_db)):
     db_user = await db.user.find_unique(where={"email": user.email})
-    if not db_user or not auth.verify_password(user.password, db_user.password):
+    try:
+        password_ok = bool(db_user) and await auth.verify_password_async(user.password, db_user.password)
+    except HashingPoolBusy:
+        raise password_pool_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -68,26 +112,92 @@ async def login(user: schemas.LoginSchema, db: Prisma = Depends(get_db)):
         "token_type": "bearer"
     }
 
-@app.post("/search")
-async def search_hotels(
-    search_params: schemas.HotelSearch,
-    current_user: schemas.User = Depends(auth.get_current_user),
-    db: Prisma = Depends(get_db)
-):
+def store_search_result(search_dict: dict, scraped_hotels: list, comparison_list: list,
+                        ttl: Optional[float] = None) -> EncodedJSON:
+    """Record a finished search: price snapshots plus the cached, pre-encoded comparison."""
+    if settings.SNAPSHOTS_ENABLED and scraped_hotels:
+        save_snapshots_in_background(prisma, scraped_hotels, search_dict, settings.SNAPSHOT_BATCH_SIZE)
+
+    # Encoded once, so cache hits and 304s never re-serialize the comparison
+    response = encode_json({"result": comparison_list})
+    # Don't pin an empty result (usually a failed crawl) for the whole TTL
+    if comparison_list:
+        search_cache.set(search_cache_key(search_dict), response, ttl)
+    return response
+
+async def compare_hotels(search_dict: dict, ttl: Optional[float] = None) -> EncodedJSON:
+    scraped_hotels = await scrapy_service.search(search_dict)
+    grouped_hotels = group_hotels_by_name(scraped_hotels)
+    comparison_list = organize_hotel_comparison(grouped_hotels)
+    return store_search_result(search_dict, scraped_hotels, comparison_list, ttl)
+
+async def precrawl_search(search_dict: dict) -> EncodedJSON:
+    cache_key = search_cache_key(search_dict)
+    # Keep pre-crawled results until the next refresh has had time to replace them
+    ttl = settings.PRECRAWL_INTERVAL_SECONDS + settings.SEARCH_CACHE_TTL_SECONDS
+    return await search_flights.run(cache_key, lambda: compare_hotels(search_dict, ttl))
+
+# Keeps popular searches warm in search_cache; a no-op unless PRECRAWL_CITIES is set
+precrawl_scheduler = PrecrawlScheduler(
+    precrawl_search,
+    cities=settings.PRECRAWL_CITIES,
+    nights_ahead=settings.PRECRAWL_NIGHTS_AHEAD,
+    interval=settings.PRECRAWL_INTERVAL_SECONDS,
+    concurrency=settings.PRECRAWL_CONCURRENCY,
+)
+
+# Background searches polled through /search/jobs
+search_jobs = SearchJobManager(
+    scrapy_service,
+    cache=search_cache,
+    flights=search_flights,
+    on_complete=store_search_result,
+    timeout=settings.SEARCH_JOB_TIMEOUT_SECONDS,
+    retention=settings.SEARCH_JOB_RETENTION_SECONDS,
+    max_entries=settings.SEARCH_JOB_MAX_ENTRIES,
+)
+
+def search_query(
+    city: str,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    star_rating: Optional[int] = None,
+    check_in: Optional[date] = None,
+    check_out: Optional[date] = None,
+    max_pages: Optional[int] = Query(None, ge=1, le=MAX_RESULT_PAGES),
+) -> schemas.HotelSearch:
+    """``HotelSearch`` taken from the query string, for ``GET /search``."""
+    try:
+        return schemas.HotelSearch(
+            city=city,
+            min_price=min_price,
+            max_price=max_price,
+            star_rating=star_rating,
+            check_in=check_in,
+            check_out=check_out,
+            max_pages=max_pages,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+async def run_search(search_params: schemas.HotelSearch, request: Request) -> Response:
     try:
         # Convert search params to dict for the spider
         search_dict = search_params.dict()
         
-        # Run spiders and wait for completion
-        scrapy_service.run_spider(search_dict)
-        
-        # Get results
-        scraped_hotels = scrapy_service.get_items()
-        grouped_hotels = group_hotels_by_name(scraped_hotels)
-        comparison_list = organize_hotel_comparison(grouped_hotels)
+        cache_key = search_cache_key(search_dict)
+        response = search_cache.get(cache_key)
+        if response is None:
+            # Crawl in a worker process, joining an identical search if one is in flight
+            response = await search_flights.run(
+                cache_key, lambda: compare_hotels(search_dict)
+            )
         
-        return {"result": comparison_list}
-    except TimeoutError:
+        # Like search_cache, browsers must not hold on to an empty result
+        cache_control = (settings.SEARCH_CACHE_CONTROL if response.content["result"]
+                         else settings.EMPTY_SEARCH_CACHE_CONTROL)
+        return etags.encoded_response(request, response, cache_control)
+    except asyncio.TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="The search operation took too long to complete. Please try again."
@@ -98,32 +208,131 @@ async def search_hotels(
             detail=f"An error occurred during the search: {str(e)}"
         )
 
+@app.get("/search")
+async def search_hotels(
+    request: Request,
+    search_params: schemas.HotelSearch = Depends(search_query),
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
+    """
+    Search with the parameters in the query string. Being a GET, the result can
+    be cached and revalidated: send its ``ETag`` back as ``If-None-Match`` (the
+    browser does so by itself) to get a 304 while the cached result is unchanged.
+    """
+    return await run_search(search_params, request)
+
+@app.post("/search")
+async def search_hotels_post(
+    search_params: schemas.HotelSearch,
+    request: Request,
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
+    """
+    Search with the parameters in a JSON body. Clients never revalidate a POST
+    by themselves; a matching ``If-None-Match`` gets 412 here (RFC 9110), so
+    conditional requests belong on ``GET /search``.
+    """
+    return await run_search(search_params, request)
+
+@app.post("/search/stream")
+async def stream_search_hotels(
+    search_params: schemas.HotelSearch,
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    """
+    Stream search results as newline-delimited JSON. A ``result`` event with the
+    comparison so far is sent as each source finishes, then a ``complete`` event
+    (or an ``error`` event if the search fails).
+    """
+    search_dict = search_params.dict()
+    cache_key = search_cache_key(search_dict)
+
+    def event(**fields) -> bytes:
+        return dumps(fields) + b"\n"
+
+    async def events():
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            yield event(event="result", source="cache", result=cached.content["result"])
+            yield event(event="complete")
+            return
+
+        comparison_list = []
+        scraped_hotels = []
+        try:
+            async for source, scraped_hotels in scrapy_service.stream(search_dict):
+                grouped_hotels = group_hotels_by_name(scraped_hotels)
+                comparison_list = organize_hotel_comparison(grouped_hotels)
+                yield event(event="result", source=source, result=comparison_list)
+        except asyncio.TimeoutError:
+            yield event(event="error", detail="The search operation took too long to complete. Please try again.")
+            return
+        except Exception as e:
+            yield event(event="error", detail=f"An error occurred during the search: {str(e)}")
+            return
+
+        store_search_result(search_dict, scraped_hotels, comparison_list)
+        yield event(event="complete")
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/search/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_search_job(
+    search_params: schemas.HotelSearch,
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    """
+    Start a search in the background and return its job id right away; poll
+    ``GET /search/jobs/{job_id}`` for progress and results.
+    """
+    job = search_jobs.create(current_user.id, search_params.dict())
+    return json_response(
+        job.to_dict(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/search/jobs/{job.id}"},
+    )
+
+@app.get("/search/jobs/{job_id}")
+async def get_search_job(
+    job_id: str,
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    """Per-source status and item counts of a search job, with the comparison so far."""
+    job = search_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Search job not found")
+    return json_response(job.to_dict())
+
+async def bump_bookmarks_version(db: Prisma, user_id: int):
+    """
+    Mark the user's bookmarks as changed; the version is what their ETag is built
+    from. Call ``auth.invalidate_user`` once the transaction has committed.
+    """
+    await db.user.update(
+        where={"id": user_id},
+        data={"bookmarksVersion": {"increment": 1}}
+    )
+
 @app.post("/bookmarks", response_model=schemas.Bookmark)
 async def create_bookmark(
     bookmark: schemas.BookmarkCreate,
     current_user: User = Depends(auth.get_current_user),
     db: Prisma = Depends(get_db)
 ):
-    new_bookmark = await db.bookmark.create(
-        data={
-            "hotelName": bookmark.hotel_name,
-            "image": bookmark.image,
-            "price": bookmark.price,
-            "rating": bookmark.rating,
-            "bookingUrl": bookmark.booking_url,
-            "userId": current_user.id
-        }
-    )
-    return schemas.Bookmark(
-        id=new_bookmark.id,
-        hotel_name=new_bookmark.hotelName,
-        image=new_bookmark.image,
-        price=new_bookmark.price,
-        rating=new_bookmark.rating,
-        booking_url=new_bookmark.bookingUrl,
-        user_id=new_bookmark.userId,
-        created_at=new_bookmark.createdAt
-    )
+    async with db.tx() as transaction:
+        new_bookmark = await transaction.bookmark.create(
+            data={
+                "hotelName": bookmark.hotel_name,
+                "image": bookmark.image,
+                "price": bookmark.price,
+                "rating": bookmark.rating,
+                "bookingUrl": bookmark.booking_url,
+                "userId": current_user.id
+            }
+        )
+        await bump_bookmarks_version(transaction, current_user.id)
+    auth.invalidate_user(current_user.email)
+    return json_response(pagination.bookmark_row(new_bookmark))
 
 @app.get("/bookmarks/{bookmark_id}", response_model=schemas.Bookmark)
 async def get_bookmark(
@@ -138,38 +347,52 @@ async def get_bookmark(
     if not bookmark or bookmark.userId != current_user.id:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     
-    return schemas.Bookmark(
-        id=bookmark.id,
-        hotel_name=bookmark.hotelName,
-        image=bookmark.image,
-        price=bookmark.price,
-        rating=bookmark.rating,
-        booking_url=bookmark.bookingUrl,
-        user_id=bookmark.userId,
-        created_at=bookmark.createdAt
-    )
+    return json_response(pagination.bookmark_row(bookmark))
 
-@app.get("/bookmarks", response_model=list[schemas.Bookmark])
+@app.get("/bookmarks", response_model=list[schemas.BookmarkFields])
 async def get_user_bookmarks(
+    request: Request,
+    limit: int = Query(settings.BOOKMARKS_PAGE_SIZE, ge=1, le=settings.BOOKMARKS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(auth.get_current_user),
     db: Prisma = Depends(get_db)
 ):
+    """
+    One page of the user's bookmarks, newest first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; it is absent on the last page. ``fields`` optionally limits
+    each bookmark to a comma-separated list of fields.
+    """
+    try:
+        selected_fields = pagination.parse_fields(fields)
+        where = {"userId": current_user.id, **pagination.after_cursor(cursor)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Creating or deleting a bookmark bumps the user's bookmarksVersion, so it
+    # versions the whole collection: checking it is a single primary-key read
+    # (not cached with the user, which may be up to a minute old) instead of
+    # fetching and encoding the page
+    owner = await db.user.find_unique(where={"id": current_user.id})
+    version = owner.bookmarksVersion if owner else 0
+    etag = etags.version_etag(current_user.id, version, limit, cursor, selected_fields)
+    if etags.etag_matches(request, etag):
+        return etags.not_modified(etag, settings.BOOKMARKS_CACHE_CONTROL)
+
+    # One extra row tells us whether another page follows
     bookmarks = await db.bookmark.find_many(
-        where={"userId": current_user.id}
+        where=where,
+        order=pagination.BOOKMARK_ORDER,
+        take=limit + 1,
     )
-    return [
-        schemas.Bookmark(
-            id=bookmark.id,
-            hotel_name=bookmark.hotelName,
-            image=bookmark.image,
-            price=bookmark.price,
-            rating=bookmark.rating,
-            booking_url=bookmark.bookingUrl,
-            user_id=bookmark.userId,
-            created_at=bookmark.createdAt
-        )
-        for bookmark in bookmarks
-    ]
+    headers = etags.cache_headers(etag, settings.BOOKMARKS_CACHE_CONTROL)
+    if len(bookmarks) > limit:
+        bookmarks = bookmarks[:limit]
+        headers["X-Next-Cursor"] = pagination.encode_cursor(bookmarks[-1])
+
+    return json_response(pagination.bookmark_rows(bookmarks, selected_fields), headers=headers)
 
 @app.delete("/bookmarks/{bookmark_id}")
 async def delete_bookmark(
@@ -190,8 +413,11 @@ async def delete_bookmark(
         raise HTTPException(status_code=403, detail="Not authorized to delete this bookmark")
     
     # Delete the bookmark
-    await db.bookmark.delete(
-        where={"id": bookmark_id}
-    )
+    async with db.tx() as transaction:
+        await transaction.bookmark.delete(
+            where={"id": bookmark_id}
+        )
+        await bump_bookmarks_version(transaction, current_user.id)
+    auth.invalidate_user(current_user.email)
     
     return {"message": "Bookmark deleted successfully"} 
\ No newline at end of file
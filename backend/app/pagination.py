@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prisma.models import Bookmark
+
+# Public field name -> Prisma attribute, in response order
+BOOKMARK_FIELDS = {
+    "id": "id",
+    "hotel_name": "hotelName",
+    "image": "image",
+    "price": "price",
+    "rating": "rating",
+    "booking_url": "bookingUrl",
+    "user_id": "userId",
+    "created_at": "createdAt",
+}
+
+# Newest first; id breaks ties between bookmarks created in the same instant
+BOOKMARK_ORDER = [{"createdAt": "desc"}, {"id": "desc"}]
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(bookmark: Bookmark) -> str:
+    """Opaque cursor pointing just past ``bookmark`` in BOOKMARK_ORDER."""
+    raw = json.dumps([bookmark.createdAt.isoformat(), bookmark.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, bookmark_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(bookmark_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def after_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """Keyset condition selecting the rows that come after ``cursor``."""
+    if not cursor:
+        return {}
+
+    created_at, bookmark_id = decode_cursor(cursor)
+    return {
+        "OR": [
+            {"createdAt": {"lt": created_at}},
+            {"createdAt": created_at, "id": {"lt": bookmark_id}},
+        ]
+    }
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Split a ``fields=id,price`` selection, defaulting to every field."""
+    if not fields:
+        return list(BOOKMARK_FIELDS)
+
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in BOOKMARK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown bookmark fields: {', '.join(unknown)}")
+    return selected
+
+def bookmark_row(bookmark: Bookmark, fields: Iterable[str] = BOOKMARK_FIELDS) -> Dict[str, Any]:
+    """Plain response dict for ``bookmark``, ready to serialize without re-validation."""
+    return {name: getattr(bookmark, BOOKMARK_FIELDS[name]) for name in fields}
+
+def bookmark_rows(bookmarks: Iterable[Bookmark], fields: List[str]) -> List[Dict[str, Any]]:
+    return [bookmark_row(bookmark, fields) for bookmark in bookmarks]
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PrecrawlScheduler:
+    """
+    Periodically re-runs popular searches in the background so that ``/search``
+    can answer them from fresh cached comparisons instead of crawling live.
+
+    ``refresh`` is awaited with a search dict (as produced by ``HotelSearch.dict()``
+    plus concrete dates) and is expected to store the comparison it computes.
+    """
+    def __init__(self, refresh: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 cities: List[str], nights_ahead: int = 1,
+                 interval: float = 600, concurrency: int = 1):
+        self.refresh = refresh
+        self.cities = cities
+        self.nights_ahead = nights_ahead
+        self.interval = interval
+        self._slots = asyncio.Semaphore(max(concurrency, 1))
+        self._task: Optional[asyncio.Task] = None
+
+    def searches(self) -> List[Dict[str, Any]]:
+        """One-night stays checking in on each of the next ``nights_ahead`` days, per city."""
+        tomorrow = date.today() + timedelta(days=1)
+        searches = []
+        for city in self.cities:
+            for offset in range(self.nights_ahead):
+                check_in = tomorrow + timedelta(days=offset)
+                searches.append({
+                    'city': city,
+                    'check_in': check_in.strftime('%Y-%m-%d'),
+                    'check_out': (check_in + timedelta(days=1)).strftime('%Y-%m-%d'),
+                    'min_price': None,
+                    'max_price': None,
+                    'star_rating': None,
+                })
+        return searches
+
+    async def _refresh_one(self, search_dict: Dict[str, Any]):
+        async with self._slots:
+            try:
+                await self.refresh(search_dict)
+            except Exception as e:
+                logger.warning(f"Pre-crawl of {search_dict['city']} ({search_dict['check_in']}) failed: {e!r}")
+
+    async def run_once(self):
+        await asyncio.gather(*(self._refresh_one(search_dict) for search_dict in self.searches()))
+
+    async def _run_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await self.run_once()
+            logger.info(f"Pre-crawled {len(self.cities)} cities in {loop.time() - started:.1f}s")
+            await asyncio.sleep(max(self.interval - (loop.time() - started), 0))
+
+    def start(self):
+        if self._task is None and self.cities:
+            self._task = asyncio.ensure_future(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional, List
 from datetime import datetime, date, timedelta
 
+from .scraper.runner import stay_dates
+from .scraper.settings import MAX_RESULT_PAGES
+
 class UserBase(BaseModel):
     email: EmailStr
     username: str
@@ -60,11 +63,38 @@ class Bookmark(BookmarkBase):
     def createdAt(self) -> datetime:
         return self.created_at
 
+class BookmarkFields(BaseModel):
+    """A ``GET /bookmarks`` row: a bookmark limited to the requested ``fields``."""
+    id: Optional[int] = None
+    hotel_name: Optional[str] = None
+    image: Optional[str] = None
+    price: Optional[float] = None
+    rating: Optional[float] = None
+    booking_url: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
 class HotelSearch(BaseModel):
     city: str
     min_price: Optional[float] = None
     max_price: Optional[float] = None
     star_rating: Optional[int] = None
+    # Stay dates; one night from tomorrow when omitted
+    check_in: Optional[date] = None
+    check_out: Optional[date] = None
+    # Result pages fetched per source (1 when omitted)
+    max_pages: Optional[int] = Field(None, ge=1, le=MAX_RESULT_PAGES)
+
+    @model_validator(mode='after')
+    def check_dates(self):
+        # Against the dates the search runs with, so a lone check_out is
+        # checked against the default check_in
+        check_in, check_out = stay_dates(self.check_in, self.check_out)
+        if check_in < date.today():
+            raise ValueError("check_in must not be in the past")
+        if check_out <= check_in:
+            raise ValueError("check_out must be after check_in")
+        return self
 
 class LoginSchema(BaseModel):
     email: EmailStr
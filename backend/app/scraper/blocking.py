@@ -0,0 +1,61 @@
+import json
+import logging
+from typing import List, Tuple
+
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+from app.scraper.settings import (
+    RESOURCE_BLOCKING_ENABLED,
+    RESOURCE_BLOCKING_STATS,
+    BLOCKED_RESOURCE_TYPES,
+    RESOURCE_TYPE_URL_PATTERNS,
+    BLOCKED_URL_PATTERNS,
+)
+
+logger = logging.getLogger(__name__)
+
+def blocked_url_patterns() -> List[str]:
+    patterns = list(BLOCKED_URL_PATTERNS)
+    for resource_type in BLOCKED_RESOURCE_TYPES:
+        patterns.extend(RESOURCE_TYPE_URL_PATTERNS.get(resource_type, []))
+    return patterns
+
+def configure_options(options: Options):
+    """Have Chrome log network events, which ``request_counts`` reads back."""
+    if RESOURCE_BLOCKING_ENABLED and RESOURCE_BLOCKING_STATS:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+def install(driver):
+    """Block the configured URLs for the lifetime of ``driver``'s session."""
+    if not RESOURCE_BLOCKING_ENABLED:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+
+def request_counts(driver) -> Tuple[int, int]:
+    """
+    ``(blocked, allowed)`` network requests since the previous call, read from
+    (and thereby clearing) the browser's performance log. (0, 0) when counting
+    is disabled.
+    """
+    if not (RESOURCE_BLOCKING_ENABLED and RESOURCE_BLOCKING_STATS):
+        return 0, 0
+
+    try:
+        entries = driver.get_log('performance')
+    except WebDriverException as e:
+        logger.debug(f"Performance log unavailable: {e!r}")
+        return 0, 0
+
+    sent = blocked = 0
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        if method == 'Network.requestWillBeSent':
+            if not message['params']['request']['url'].startswith('data:'):
+                sent += 1
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            blocked += 1
+    return blocked, max(sent - blocked, 0)
@@ -0,0 +1,175 @@
+"""
+Record/replay of results pages.
+
+With ``PAGE_CAPTURE_MODE = 'record'`` every results page a spider receives (the
+plain HTTP body or the browser's ``page_source``) is written to disk together
+with its final URL and status. With ``'replay'`` those captures are served back
+instead, so a crawl runs through the same tiered fetch, extractors, filters and
+pipeline with no browser and no network.
+
+Captures live under ``PAGE_CAPTURE_DIR``, one directory per spider and search:
+
+    <dir>/<spider>/<search key>/search.json         spider, search params, notes
+    <dir>/<spider>/<search key>/<page key>.json.gz  one fetched page
+
+The search key hashes the spider's search parameters, so a replay only finds
+pages recorded for the same parameters, dates included: searches that leave
+out ``check_in``/``check_out`` (``HotelSearch`` takes both) mean tomorrow and
+only replay on the day they were recorded. The page key hashes the fetch tier
+and request URL, which keeps an HTTP page and its browser re-render apart.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from scrapy.http import HtmlResponse
+
+from app.scraper.settings import PAGE_CAPTURE_MODE, PAGE_CAPTURE_DIR
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Spider attributes that identify a search
+SEARCH_PARAMS = ('city', 'check_in', 'check_out', 'adults', 'children', 'rooms',
+                 'min_price', 'max_price', 'star_rating', 'max_pages')
+
+MANIFEST = 'search.json'
+PAGE_SUFFIX = '.json.gz'
+
+def search_params(spider) -> Dict[str, Any]:
+    params = {}
+    for name in SEARCH_PARAMS:
+        value = getattr(spider, name, None)
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        params[name] = value
+    return params
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+def search_key(spider_name: str, params: Dict[str, Any]) -> str:
+    return _digest(json.dumps([spider_name, params], sort_keys=True, default=str))
+
+def page_key(tier: Optional[str], url: str) -> str:
+    return _digest(f"{tier or ''} {url}")
+
+def load_page(path: str, request=None) -> HtmlResponse:
+    """Rebuild the response recorded in a page capture."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        page = json.load(f)
+    return HtmlResponse(
+        page['final_url'],
+        status=page['status'],
+        body=page['body'].encode('utf-8'),
+        encoding='utf-8',
+        request=request,
+        flags=['replayed'],
+    )
+
+def iter_searches(directory: str = PAGE_CAPTURE_DIR) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+    """Yield ``(manifest, page paths)`` for every recorded search under ``directory``."""
+    if not os.path.isdir(directory):
+        return
+    for spider_name in sorted(os.listdir(directory)):
+        spider_dir = os.path.join(directory, spider_name)
+        if not os.path.isdir(spider_dir):
+            continue
+        for key in sorted(os.listdir(spider_dir)):
+            search_dir = os.path.join(spider_dir, key)
+            try:
+                with open(os.path.join(search_dir, MANIFEST), encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pages = sorted(
+                os.path.join(search_dir, name) for name in os.listdir(search_dir)
+                if name.endswith(PAGE_SUFFIX)
+            )
+            yield manifest, pages
+
+class PageCaptures:
+    """Reads and writes the captures for the configured mode; a no-op when it is off."""
+    def __init__(self, directory: str = PAGE_CAPTURE_DIR, mode: str = PAGE_CAPTURE_MODE):
+        if mode not in ('', RECORD, REPLAY):
+            raise ValueError(f"Unknown page capture mode: {mode!r}")
+        self.directory = directory
+        self.mode = mode
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _search_dir(self, spider) -> str:
+        key = search_key(spider.name, search_params(spider))
+        return os.path.join(self.directory, spider.name, key)
+
+    def _page_path(self, spider, request) -> str:
+        name = page_key(request.meta.get('fetch_tier'), request.url) + PAGE_SUFFIX
+        return os.path.join(self._search_dir(spider), name)
+
+    def _manifest(self, search_dir: str, spider) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(search_dir, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'spider': spider.name, 'params': search_params(spider), 'notes': {}}
+
+    def _write_manifest(self, search_dir: str, manifest: Dict[str, Any]):
+        os.makedirs(search_dir, exist_ok=True)
+        path = os.path.join(search_dir, MANIFEST)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def record(self, spider, request, response):
+        """Save a fetched results page (HTTP body or rendered page source)."""
+        search_dir = self._search_dir(spider)
+        page = {
+            'url': request.url,
+            'final_url': response.url,
+            'tier': request.meta.get('fetch_tier'),
+            'status': response.status,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'body': response.text,
+        }
+        path = self._page_path(spider, request)
+        with self._lock:
+            self._write_manifest(search_dir, self._manifest(search_dir, spider))
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+                json.dump(page, f)
+            os.replace(path + '.tmp', path)
+        spider.logger.debug(f"Recorded {request.url} to {path}")
+
+    def replay(self, spider, request) -> Optional[HtmlResponse]:
+        """The recorded response for ``request``, or None if it was never captured."""
+        path = self._page_path(spider, request)
+        if not os.path.exists(path):
+            return None
+        return load_page(path, request)
+
+    def note(self, spider, name: str, value: Any):
+        """Keep a value the spider worked out live (e.g. a city code) with the search."""
+        search_dir = self._search_dir(spider)
+        with self._lock:
+            manifest = self._manifest(search_dir, spider)
+            manifest['notes'][name] = value
+            self._write_manifest(search_dir, manifest)
+
+    def recall(self, spider, name: str) -> Any:
+        """A value stored with ``note`` for this search, or None."""
+        return self._manifest(self._search_dir(spider), spider)['notes'].get(name)
+
+page_captures = PageCaptures()
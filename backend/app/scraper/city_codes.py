@@ -1,3 +1,15 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from filelock import FileLock
+
+from app.scraper.settings import CITY_CODE_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
 # Mapping of city names to Agoda city codes
 # This is a sample mapping - you'll need to add more cities as needed
 CITY_CODES = {
@@ -26,4 +38,76 @@ def get_agoda_city_code(city_name: str) -> str:
     city_name = city_name.lower().strip()
     if city_name not in CITY_CODES:
         raise ValueError(f"City code not found for: {city_name}")
-    return CITY_CODES[city_name] 
\ No newline at end of file
+    return CITY_CODES[city_name]
+
+class CityCodeResolver:
+    """
+    Agoda city code lookup backed by a JSON file on disk.
+
+    The file starts out seeded from ``CITY_CODES``; codes the spider discovers
+    through the Agoda search UI are written back, so each city only pays for
+    the browser round trip once. Every crawl worker process has its own
+    resolver, so misses re-read the file for codes other workers found, and
+    writes merge into the file under a file lock instead of overwriting it.
+    """
+    def __init__(self, path: str = CITY_CODE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{path}.lock")
+        self._codes: Optional[Dict[str, str]] = None
+
+    @staticmethod
+    def _key(city_name: str) -> str:
+        return city_name.lower().strip()
+
+    def _read(self) -> Dict[str, str]:
+        codes = dict(CITY_CODES)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                codes.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable city code cache {self.path}: {e}")
+        return codes
+
+    def _load(self) -> Dict[str, str]:
+        if self._codes is None:
+            self._codes = self._read()
+        return self._codes
+
+    def get(self, city_name: str) -> Optional[str]:
+        key = self._key(city_name)
+        with self._lock:
+            code = self._load().get(key)
+            if code is None:
+                # Another worker may have discovered it since we last read the file
+                self._codes = self._read()
+                code = self._codes.get(key)
+            return code
+
+    def remember(self, city_name: str, code: str):
+        key = self._key(city_name)
+        with self._lock:
+            if self._load().get(key) == code:
+                return
+
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self._file_lock:
+                    # Merge with what other workers wrote since we last read the file
+                    codes = self._read()
+                    codes[key] = code
+                    # Write to a temp file and swap it in so readers never see a partial file
+                    tmp_path = f"{self.path}.tmp"
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(codes, f, indent=2, sort_keys=True)
+                    os.replace(tmp_path, self.path)
+                self._codes = codes
+            except OSError as e:
+                self._codes[key] = code
+                logger.warning(f"Could not persist city code for {key}: {e}")
+
+city_code_resolver = CityCodeResolver()
@@ -0,0 +1,165 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+from app.scraper import blocking
+from app.scraper.settings import (
+    SELENIUM_DRIVER_ARGUMENTS,
+    WEBDRIVER_POOL_SIZE,
+    WEBDRIVER_MAX_USES,
+    WEBDRIVER_ACQUIRE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+def build_chrome_options() -> Options:
+    chrome_options = Options()
+    for argument in SELENIUM_DRIVER_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    blocking.configure_options(chrome_options)
+    return chrome_options
+
+class WebDriverPool:
+    """
+    Bounded pool of warm headless Chrome sessions shared by all spiders.
+
+    At most ``size`` browsers exist at any time; callers beyond that wait for
+    one to be returned. A browser is recycled after ``max_uses`` borrows, or
+    as soon as it stops responding.
+    """
+    def __init__(self, size: int = WEBDRIVER_POOL_SIZE,
+                 max_uses: int = WEBDRIVER_MAX_USES,
+                 acquire_timeout: float = WEBDRIVER_ACQUIRE_TIMEOUT):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[webdriver.Chrome] = []
+        self._uses: Dict[int, int] = {}
+        self._closed = False
+
+    def _launch(self) -> webdriver.Chrome:
+        driver = webdriver.Chrome(options=build_chrome_options())
+        try:
+            blocking.install(driver)
+        except WebDriverException as e:
+            logger.warning(f"Could not enable resource blocking: {e!r}")
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver: webdriver.Chrome):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.execute_script('return 1')
+            return True
+        except WebDriverException:
+            return False
+
+    def warm(self):
+        """Launch idle browsers until the pool is full, so the first searches skip Chrome startup."""
+        # Hold every free slot so nobody borrows while we count
+        free = 0
+        while self._slots.acquire(blocking=False):
+            free += 1
+
+        launched = []
+        try:
+            with self._lock:
+                missing = free - len(self._idle)
+            for _ in range(max(missing, 0)):
+                try:
+                    launched.append(self._launch())
+                except WebDriverException as e:
+                    logger.error(f"Could not pre-launch Chrome: {e}")
+                    break
+            with self._lock:
+                self._idle.extend(launched)
+        finally:
+            for _ in range(free):
+                self._slots.release()
+        logger.info(f"WebDriver pool warmed with {len(launched)} browser(s)")
+
+    def acquire(self, timeout: Optional[float] = None) -> webdriver.Chrome:
+        """
+        Borrow a healthy browser, launching one if none is idle.
+
+        Raises:
+            TimeoutError: If no browser frees up within ``timeout`` seconds
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser available after {timeout} seconds")
+
+        try:
+            while True:
+                with self._lock:
+                    driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    driver = self._launch()
+                    break
+                if self._is_alive(driver):
+                    break
+                logger.warning("Discarding crashed browser from the pool")
+                self._quit(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        return driver
+
+    def release(self, driver: webdriver.Chrome, discard: bool = False):
+        """Return a borrowed browser, recycling it if it is worn out or broken."""
+        try:
+            if discard or self._closed or self._uses.get(id(driver), 0) >= self.max_uses:
+                self._quit(driver)
+                return
+
+            try:
+                # Don't leak cookies or the last page into the next search
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                driver.get('about:blank')
+            except WebDriverException:
+                self._quit(driver)
+                return
+
+            with self._lock:
+                self._idle.append(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, discard=not self._is_alive(driver))
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        """Quit all idle browsers; borrowed ones are quit when they are returned."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+driver_pool = WebDriverPool()
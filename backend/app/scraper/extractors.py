@@ -0,0 +1,97 @@
+"""
+Result-card extractors, one per source.
+
+Each extractor compiles its card and field selectors to lxml XPath objects once,
+at import, and reads listings straight from the page bytes in a single pass over
+each card. This replaces parsel's per-call CSS translation and the extra decode
+of the page into an ``HtmlResponse``; the selectors (and therefore the results)
+are the same ones the spiders used with parsel.
+"""
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+from cssselect import HTMLTranslator
+from lxml import etree
+
+from app.scraper.items import HotelListing
+
+_translator = HTMLTranslator()
+_parsers: Dict[str, etree.HTMLParser] = {}
+
+def _xpath(css: str, suffix: str = '', prefix: str = 'descendant-or-self::') -> etree.XPath:
+    return etree.XPath(_translator.css_to_xpath(css, prefix=prefix) + suffix)
+
+def _first(results) -> Optional[str]:
+    return str(results[0]) if results else None
+
+def parse_html(body: Union[bytes, str], encoding: str = 'utf-8'):
+    """Parse a page once into an lxml tree (None for an empty page)."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+        encoding = 'utf-8'
+    parser = _parsers.get(encoding)
+    if parser is None:
+        parser = _parsers[encoding] = etree.HTMLParser(encoding=encoding)
+    return etree.fromstring(body, parser=parser)
+
+class CardExtractor:
+    """
+    Pulls ``HotelListing`` records out of a results page.
+
+    Subclasses set ``source`` and the compiled XPaths: ``cards`` (evaluated on
+    the page root) and the per-card ``name``, ``price``, ``image``, ``url`` and
+    ``rating`` (a count of star elements).
+    """
+    source: str
+    cards: etree.XPath
+    name: etree.XPath
+    price: etree.XPath
+    rating: etree.XPath
+    image: etree.XPath
+    url: etree.XPath
+
+    def extract(self, body: Union[bytes, str], base_url: str, encoding: str = 'utf-8') -> List[HotelListing]:
+        root = parse_html(body, encoding)
+        if root is None:
+            return []
+
+        items = []
+        for card in self.cards(root):
+            try:
+                price_text = _first(self.price(card))
+                price = float(price_text.replace('BDT', '').replace(',', '').strip())
+            except (AttributeError, ValueError):
+                continue  # No usable price; parsel path skipped these too
+
+            booking_url = _first(self.url(card))
+            items.append(HotelListing(
+                hotel_name=_first(self.name(card)),
+                price=price,
+                rating=int(self.rating(card)),
+                image=_first(self.image(card)),
+                booking_url=urljoin(base_url, booking_url) if booking_url else base_url,
+                source=self.source,
+            ))
+        return items
+
+class BookingExtractor(CardExtractor):
+    source = 'booking.com'
+    cards = _xpath('[data-testid="property-card"]')
+    name = _xpath('[data-testid="title"]', '/text()')
+    price = _xpath('[data-testid="price-and-discounted-price"]', '/text()')
+    rating = etree.XPath('count(' + _translator.css_to_xpath('[data-testid="rating-stars"] span') + ')')
+    image = _xpath('[data-testid="image"]', '/@src')
+    url = _xpath('[data-testid="title-link"]', '/@href')
+
+class AgodaExtractor(CardExtractor):
+    source = 'agoda'
+    # Only the cards in the main list, not the "recently viewed" strip
+    cards = _xpath('div#sort-bar + div [data-selenium="hotel-item"]')
+    name = _xpath('[data-selenium="hotel-name"]', '/text()')
+    price = _xpath('[data-selenium="display-price"]', '/text()')
+    rating = etree.XPath('count(' + _translator.css_to_xpath('[data-testid="rating-container"] svg') + ')')
+    image = _xpath('[data-element-name="ssrweb-mainphoto"] img', '/@src')
+    url = _xpath('[data-element-name="property-card-content"]', '/@href')
+
+booking_extractor = BookingExtractor()
+agoda_extractor = AgodaExtractor()
@@ -0,0 +1,129 @@
+import logging
+from typing import Callable, List, Optional
+from urllib.parse import urlencode, urlparse
+
+import scrapy
+
+from app.scraper.settings import TIERED_FETCH, HTTP_FETCH_HEADERS, RESULT_PAGING, MAX_RESULT_PAGES
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIER = 'http'
+BROWSER_TIER = 'browser'
+
+class TieredFetchMixin:
+    """
+    Fetch results pages with Scrapy's own downloader first and escalate to a
+    browser render (SeleniumMiddleware, via ``meta['selenium']``) only when the
+    plain response lacks the markers configured in ``TIERED_FETCH`` or the
+    request fails outright (e.g. a 403 bot challenge).
+
+    Escalations are counted in the crawl stats as ``fetch/<spider>/<outcome>``;
+    the rate is logged when the spider closes.
+    """
+    def fetch_strategy(self) -> dict:
+        return TIERED_FETCH.get(self.name, {})
+
+    def tiered_request(self, url: str, callback: Callable, **kwargs) -> scrapy.Request:
+        """Request for ``url`` on the first tier configured for this spider."""
+        strategy = self.fetch_strategy()
+        markers = strategy.get('markers', [])
+        meta = dict(kwargs.pop('meta', {}))
+        meta['fetch_markers'] = markers
+        if strategy.get('http_first', False):
+            meta['fetch_tier'] = HTTP_TIER
+        else:
+            meta.update(fetch_tier=BROWSER_TIER, selenium=True)
+            self._count('browser')
+        if markers:
+            # Tells SeleniumMiddleware which cards to wait for once rendered
+            meta.setdefault('selenium_wait_for', markers[0])
+
+        return scrapy.Request(
+            url,
+            callback=callback,
+            errback=self.escalate_failure,
+            headers=HTTP_FETCH_HEADERS,
+            meta=meta,
+            dont_filter=True,
+            **kwargs
+        )
+
+    def page_urls(self, url: str, max_pages) -> List[str]:
+        """
+        ``url`` followed by the URLs of the next ``max_pages - 1`` result pages,
+        so they can all be requested at once (bounded by the spider's
+        CONCURRENT_REQUESTS) rather than one after another.
+        """
+        pages = min(max(int(max_pages or 1), 1), MAX_RESULT_PAGES)
+        paging = RESULT_PAGING.get(self.name)
+        if paging is None:
+            return [url]
+
+        urls = [url]
+        for page in range(1, pages):
+            value = paging['first'] + page * paging['step']
+            urls.append(f"{url}&{urlencode({paging['param']: value})}")
+        return urls
+
+    def page_requests(self, url: str, max_pages, callback: Callable):
+        """
+        Tiered requests for ``page_urls(url, max_pages)``, fetched side by side.
+
+        DOWNLOAD_DELAY spaces out requests within one download slot, so pages
+        sharing the site's slot would still go out one per delay whatever
+        CONCURRENT_REQUESTS allows. Each extra page gets a slot of its own
+        instead; every slot still keeps the delay between its own requests
+        (e.g. a page's browser retry).
+        """
+        host = urlparse(url).hostname
+        for page, page_url in enumerate(self.page_urls(url, max_pages)):
+            meta = {'download_slot': f'{host}#page{page}'} if page else {}
+            yield self.tiered_request(page_url, callback=callback, meta=meta)
+
+    def needs_browser(self, response) -> bool:
+        """True for a plain HTTP response that has none of the required markers."""
+        if response.meta.get('fetch_tier') != HTTP_TIER:
+            return False
+
+        markers = response.meta.get('fetch_markers', [])
+        if not markers or any(response.css(marker) for marker in markers):
+            self._count('http')
+            return False
+        return True
+
+    def escalate(self, request: scrapy.Request, reason: str) -> Optional[scrapy.Request]:
+        """Re-issue an HTTP-tier ``request`` through the browser, or None if it already was."""
+        if request.meta.get('fetch_tier') != HTTP_TIER:
+            return None
+
+        self._count('escalated')
+        self.logger.info(f"Escalating {request.url} to the browser: {reason}")
+        meta = dict(request.meta, fetch_tier=BROWSER_TIER, selenium=True)
+        return request.replace(meta=meta, dont_filter=True)
+
+    def escalate_failure(self, failure):
+        """Errback for tiered requests: HTTP errors and bot walls get a browser retry."""
+        request = failure.request
+        retry = self.escalate(request, failure.getErrorMessage())
+        if retry is None:
+            self.logger.error(f"Browser fetch of {request.url} failed: {failure.getErrorMessage()}")
+            return
+        yield retry
+
+    def _count(self, outcome: str):
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            crawler.stats.inc_value(f'fetch/{self.name}/{outcome}')
+
+    def escalation_rate(self) -> Optional[float]:
+        """Share of HTTP-tier fetches that had to be redone in the browser."""
+        stats = self.crawler.stats
+        escalated = stats.get_value(f'fetch/{self.name}/escalated', 0)
+        attempts = escalated + stats.get_value(f'fetch/{self.name}/http', 0)
+        return escalated / attempts if attempts else None
+
+    def closed(self, reason):
+        rate = self.escalation_rate()
+        if rate is not None:
+            self.logger.info(f"{self.name}: {rate:.0%} of HTTP fetches escalated to the browser")
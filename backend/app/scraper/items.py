@@ -0,0 +1,39 @@
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+from comparator import normalize_hotel_name
+
+@dataclass(init=False)
+class HotelListing:
+    """
+    One hotel card scraped from one source.
+
+    Slotted to keep per-listing memory small when result sets grow, and carries
+    its normalized name so the comparator never re-normalizes it. Being a
+    dataclass, Scrapy treats it as an item and passes it through the pipelines.
+    """
+    __slots__ = ('hotel_name', 'price', 'rating', 'image', 'booking_url', 'source', 'normalized_name')
+
+    hotel_name: str
+    price: float
+    rating: float
+    image: str
+    booking_url: str
+    source: str
+    normalized_name: str
+
+    def __init__(self, hotel_name: str, price: float, rating: float = 0,
+                 image: Optional[str] = '', booking_url: Optional[str] = '',
+                 source: str = 'unknown', normalized_name: Optional[str] = None):
+        self.hotel_name = hotel_name
+        self.price = price
+        self.rating = rating
+        self.image = image or ''
+        self.booking_url = booking_url or ''
+        self.source = source
+        if normalized_name is None:
+            normalized_name = normalize_hotel_name(hotel_name) if isinstance(hotel_name, str) else ''
+        self.normalized_name = normalized_name
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
@@ -1,94 +1,130 @@
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http import HtmlResponse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from twisted.internet.threads import deferToThread
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 
-class SeleniumMiddleware:
-    def __init__(self):
-        chrome_options = Options()
-        chrome_options.add_argument('--headless=new')  # Use new headless mode
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 30)  # Increased wait time to 30 seconds
+from app.scraper import blocking
+from app.scraper.captures import page_captures
+from app.scraper.driver_pool import driver_pool
+from app.scraper.settings import WAIT_TIMEOUTS
+from app.scraper.waits import WaitTimings, wait_until, document_ready, count_settled
+
+class PageCaptureMiddleware:
+    """
+    Records results pages to disk, or replays them instead of fetching, per
+    ``PAGE_CAPTURE_MODE`` (see app/scraper/captures.py).
 
+    Results pages are the spiders' tiered requests (``meta['fetch_tier']``).
+    Sits in front of SeleniumMiddleware, so a replayed page never reaches a
+    browser, and behind redirects and decompression, so it records final pages.
+    """
     def process_request(self, request, spider):
-        if request.meta.get('selenium'):
+        if not page_captures.replaying or request.url.startswith('data:'):
+            return None
+
+        response = page_captures.replay(spider, request) if 'fetch_tier' in request.meta else None
+        if response is None:
+            # Nothing leaves the machine while replaying
+            raise IgnoreRequest(f"No capture of {request.url} to replay")
+        if spider.crawler.stats is not None:
+            spider.crawler.stats.inc_value(f'captures/{spider.name}/replayed')
+        return response
+
+    def process_response(self, request, response, spider):
+        if page_captures.recording and 'fetch_tier' in request.meta and isinstance(response, HtmlResponse):
             try:
-                # Set a custom user agent
-                self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                    "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                })
-                
-                self.driver.get(request.url)
-                
-                # Wait for the page to be fully loaded
-                self.wait.until(lambda driver: driver.execute_script('return document.readyState') == 'complete')
-                
-                # Additional wait for dynamic content
-                time.sleep(5)
-                
-                # Check if we have the expected content
-                if 'agoda.com' in request.url:
-                    # Try to find hotel items
-                    hotel_items = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-selenium="hotel-item"]')
-                    if not hotel_items:
-                        # If no items found, wait a bit longer and try again
-                        time.sleep(5)
-                        hotel_items = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-selenium="hotel-item"]')
-                
-                elif 'booking.com' in request.url:
-                    # Try to find property cards
-                    property_cards = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="property-card"]')
-                    if not property_cards:
-                        # If no cards found, wait a bit longer and try again
-                        time.sleep(5)
-                        property_cards = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-testid="property-card"]')
-                
-                # Get the page source
-                body = self.driver.page_source
-                
-                # Log the content for debugging
-                spider.logger.info(f"Page source length: {len(body)}")
+                page_captures.record(spider, request, response)
+                if spider.crawler.stats is not None:
+                    spider.crawler.stats.inc_value(f'captures/{spider.name}/recorded')
+            except OSError as e:
+                spider.logger.warning(f"Could not record {request.url}: {e}")
+        return response
+
+class SeleniumMiddleware:
+    """Renders ``request.meta['selenium']`` requests in a browser borrowed from the shared pool."""
+
+    async def process_request(self, request, spider):
+        if request.meta.get('selenium'):
+            # Selenium blocks, so keep it off the reactor thread
+            return await deferToThread(self._render_pooled, request, spider)
+
+    def _render_pooled(self, request, spider):
+        with driver_pool.driver() as driver:
+            return self._render(driver, request, spider)
+
+    def _render(self, driver, request, spider):
+        try:
+            # Set a custom user agent
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            })
+            
+            # Drop network events left over from the browser's previous page
+            blocking.request_counts(driver)
+            driver.get(request.url)
+            
+            # Wait for the page to be fully loaded, then for the result cards
+            # to render and stop changing
+            waits = WaitTimings(spider)
+            with waits.phase('page_load'):
+                wait_until(driver, document_ready, WAIT_TIMEOUTS['page_load'])
+
+            # Spiders that need more than a page load (e.g. scrolling to lazy-load
+            # cards) drive the page further before the cards are counted
+            prepare_page = getattr(spider, 'prepare_page', None)
+            if prepare_page is not None:
+                prepare_page(driver, waits)
+
+            card_selector = request.meta.get('selenium_wait_for')
+            if card_selector is None:
                 if 'agoda.com' in request.url:
-                    spider.logger.info(f"Found {len(hotel_items)} hotel items")
+                    card_selector = 'div[data-selenium="hotel-item"]'
                 elif 'booking.com' in request.url:
-                    spider.logger.info(f"Found {len(property_cards)} property cards")
-                
-                return HtmlResponse(
-                    self.driver.current_url,
-                    body=body,
-                    encoding='utf-8',
-                    request=request
-                )
-                
-            except Exception as e:
-                spider.logger.error(f"Error in Selenium middleware: {e}")
-                # Return whatever content we have
-                body = self.driver.page_source
-                return HtmlResponse(
-                    self.driver.current_url,
-                    body=body,
-                    encoding='utf-8',
-                    request=request
-                )
+                    card_selector = 'div[data-testid="property-card"]'
 
-    def __del__(self):
-        try:
-            self.driver.quit()
-        except:
-            pass 
\ No newline at end of file
+            if card_selector:
+                # First cards rendered (bounded by 'results'), then lazy loading
+                # has stopped adding more (bounded by 'cards_settle')
+                with waits.phase('results'):
+                    wait_until(
+                        driver,
+                        lambda driver: driver.find_elements(By.CSS_SELECTOR, card_selector),
+                        WAIT_TIMEOUTS['results']
+                    )
+                with waits.phase('cards_settle'):
+                    card_count = wait_until(driver, count_settled(card_selector), WAIT_TIMEOUTS['cards_settle'])
+                if not card_count:
+                    card_count = len(driver.find_elements(By.CSS_SELECTOR, card_selector))
+
+            # Get the page source
+            body = driver.page_source
+
+            blocked, allowed = blocking.request_counts(driver)
+            if spider.crawler.stats is not None:
+                spider.crawler.stats.inc_value(f'resources/{spider.name}/blocked', blocked)
+                spider.crawler.stats.inc_value(f'resources/{spider.name}/allowed', allowed)
+            spider.logger.info(f"Blocked {blocked} of {blocked + allowed} page requests")
+            
+            # Log the content for debugging
+            spider.logger.info(f"Page source length: {len(body)}")
+            if card_selector:
+                spider.logger.info(f"Found {card_count} result cards")
+            
+            return HtmlResponse(
+                driver.current_url,
+                body=body,
+                encoding='utf-8',
+                request=request
+            )
+            
+        except Exception as e:
+            spider.logger.error(f"Error in Selenium middleware: {e}")
+            # Return whatever content we have
+            body = driver.page_source
+            return HtmlResponse(
+                driver.current_url,
+                body=body,
+                encoding='utf-8',
+                request=request
+            )
@@ -1,14 +1,104 @@
+import logging
+import re
+from typing import Any, List, Optional
+from urllib.parse import urljoin
+
+from scrapy.exceptions import DropItem
+
+from app.scraper.items import HotelListing
+
+logger = logging.getLogger(__name__)
+
+# Sent with every flushed batch of validated items. Handlers receive
+# ``items`` (a list of HotelListing) and ``spider``.
+items_batch = object()
+
+# Used to absolutize relative links per item source
+SOURCE_BASE_URLS = {
+    'agoda': 'https://www.agoda.com/',
+    'booking.com': 'https://www.booking.com/',
+}
+
+_PRICE_JUNK = re.compile(r'[^\d.]')
+
+def _parse_price(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(_PRICE_JUNK.sub('', value))
+        except ValueError:
+            return None
+    return None
+
+def normalize_item(item: HotelListing) -> Optional[HotelListing]:
+    """
+    Validate and normalize a scraped listing in place.
+
+    Returns:
+        The listing, or None if it has no name or no usable price
+    """
+    name = item.hotel_name.strip() if isinstance(item.hotel_name, str) else ''
+    price = _parse_price(item.price)
+    if not name or price is None:
+        return None
+
+    base_url = SOURCE_BASE_URLS.get(item.source)
+    if item.booking_url and base_url:
+        item.booking_url = urljoin(base_url, item.booking_url)
+
+    if item.image.startswith('//'):
+        item.image = 'https:' + item.image
+
+    item.hotel_name = name
+    item.price = price
+    return item
+
 class HotelScraperPipeline:
-    def __init__(self):
-        self.items = []
-        print("Pipeline initialized")  # Debug print
+    """
+    Validates and normalizes each item, then hands items downstream in batches of
+    ``PIPELINE_BATCH_SIZE`` through the ``items_batch`` signal. The pipeline keeps
+    nothing beyond the batch being filled.
+    """
+    def __init__(self, signals, batch_size: int = 50, log_level: int = logging.DEBUG):
+        self.signals = signals
+        self.batch_size = max(batch_size, 1)
+        self.log_level = log_level
+        self.batch: List[HotelListing] = []
+        self.processed = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        log_level = crawler.settings.get('PIPELINE_LOG_LEVEL', 'DEBUG')
+        if isinstance(log_level, str):
+            log_level = logging.getLevelName(log_level.upper())
+        return cls(
+            crawler.signals,
+            batch_size=crawler.settings.getint('PIPELINE_BATCH_SIZE', 50),
+            log_level=log_level,
+        )
 
     def process_item(self, item, spider):
-        print(f"Processing item in pipeline: {item}")  # Debug print
-        self.items.append(item)
+        if normalize_item(item) is None:
+            self.dropped += 1
+            raise DropItem(f"Missing hotel name or price: {item.hotel_name!r}")
+
+        self.processed += 1
+        self.batch.append(item)
+        if len(self.batch) >= self.batch_size:
+            self.flush(spider)
         return item
 
+    def flush(self, spider):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        self.signals.send_catch_log(signal=items_batch, items=batch, spider=spider)
+        if logger.isEnabledFor(self.log_level):
+            logger.log(self.log_level, f"{spider.name}: flushed {len(batch)} items")
+
     def close_spider(self, spider):
-        print(f"Closing spider, collected {len(self.items)} items")  # Debug print
-        print(f"Items collected: {self.items}")  # Debug print
-        return self.items 
\ No newline at end of file
+        self.flush(spider)
+        if logger.isEnabledFor(self.log_level):
+            logger.log(self.log_level, f"{spider.name}: {self.processed} items processed, {self.dropped} dropped")
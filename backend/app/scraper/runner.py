@@ -1,65 +1,319 @@
-from crochet import setup, wait_for
-from scrapy.crawler import CrawlerRunner
-from scrapy.utils.project import get_project_settings
-from app.scraper.spiders.booking_spider import BookingSpider
-from app.scraper.spiders.agoda_spider import AgodaSpider
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from app.scraper.spiders.my_spider import MySpider
-from twisted.internet.defer import DeferredList
-
-setup()
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
 
-class ScrapySearchService:
-    def __init__(self):
-        self.runner = CrawlerRunner(get_project_settings())
-        self.items = []
-
-    @wait_for(timeout=120.0)  # Increased timeout to 120 seconds
-    def run_spider(self, search_params: Dict[str, Any]):
-        self.items = []  # Initialize empty list
-
-        def collect_item(item):
-            if item is not None:  # Only append if item is not None
-                self.items.append(item)
-
-        # Get default dates if not provided
-        tomorrow = datetime.now() + timedelta(days=1)
-        day_after = tomorrow + timedelta(days=1)
-        default_check_in = tomorrow.strftime('%Y-%m-%d')
-        default_check_out = day_after.strftime('%Y-%m-%d')
-
-        # Run Agoda spider with optional parameters
-        agoda_deferred = self.runner.crawl(
-            AgodaSpider,
-            city=search_params.get('city', 'Dhaka'),
-            check_in=search_params.get('check_in', default_check_in),
-            check_out=search_params.get('check_out', default_check_out),
-            adults=search_params.get('adults', 2),
-            children=search_params.get('children', 0),
-            rooms=search_params.get('rooms', 1),
-            min_price=search_params.get('min_price', 0),
-            max_price=search_params.get('max_price', 100000),
-            star_rating=search_params.get('star_rating', 5),
-            collect_item=collect_item
-        )
+from app.scraper.items import HotelListing
+from app.scraper.settings import MAX_RESULT_PAGES
+from app.scraper.worker import worker_main
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a full search (both spiders), in seconds
+SEARCH_TIMEOUT = 120.0
+
+class CrawlError(Exception):
+    """A crawl job failed inside its worker process."""
+
+def _as_date(value) -> Optional[date]:
+    """``HotelSearch`` dates arrive as ``date``; pre-crawl passes ``YYYY-MM-DD`` strings."""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def stay_dates(check_in=None, check_out=None) -> Tuple[date, date]:
+    """The stay a search runs with: one night from tomorrow unless given."""
+    check_in = _as_date(check_in) or (datetime.now() + timedelta(days=1)).date()
+    check_out = _as_date(check_out) or check_in + timedelta(days=1)
+    return check_in, check_out
+
+def resolve_search_params(search_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolve search parameters into the keyword arguments the spiders are run with.
+
+    Args:
+        search_params: Search parameters, typically ``HotelSearch.dict()``
+
+    Returns:
+        Spider keyword arguments with defaults filled in, including concrete dates
+    """
+    check_in, check_out = stay_dates(search_params.get('check_in'), search_params.get('check_out'))
+
+    return {
+        'city': search_params.get('city', 'Dhaka'),
+        'check_in': check_in.strftime('%Y-%m-%d'),
+        'check_out': check_out.strftime('%Y-%m-%d'),
+        'adults': search_params.get('adults', 2),
+        'children': search_params.get('children', 0),
+        'rooms': search_params.get('rooms', 1),
+        'min_price': search_params.get('min_price', 0),
+        'max_price': search_params.get('max_price', 100000),
+        'star_rating': search_params.get('star_rating', 5),
+        # Capped here too (pre-crawl bypasses HotelSearch), so the cache key
+        # matches the crawl that actually runs
+        'max_pages': min(int(search_params.get('max_pages') or 1), MAX_RESULT_PAGES),
+    }
+
+def search_cache_key(search_params: Dict[str, Any]) -> Tuple:
+    """
+    Build a hashable key identifying a search by its resolved parameters.
+    Searches that differ only in city casing or whitespace share a key.
+    """
+    resolved = resolve_search_params(search_params)
+    resolved['city'] = resolved['city'].strip().lower()
+    for field in ('min_price', 'max_price'):
+        if resolved[field] is not None:
+            resolved[field] = float(resolved[field])
+    return tuple(sorted(resolved.items()))
+
+class CrawlJob:
+    """
+    API-side handle of one search running in a worker process.
+
+    Progress is delivered as events on ``events`` (in the event loop thread):
+    ``('source', name, error)`` once per finished source, then a final
+    ``('done',)`` or ``('failed', error)``.
+    """
+    def __init__(self, job_id: int, loop: asyncio.AbstractEventLoop):
+        self.id = job_id
+        self.loop = loop
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.items: List[HotelListing] = []
+        self.worker_id: Optional[int] = None
+        self.cancelled = False
+
+    def _deliver(self, event: Tuple):
+        # Called in the pool's dispatcher thread
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._apply, event)
+
+    def _apply(self, event: Tuple):
+        if event[0] == 'source':
+            _, source, new_items, error = event
+            self.items.extend(new_items)
+            self.events.put_nowait(('source', source, error))
+        else:
+            self.events.put_nowait(event)
+
+class CrawlWorkerPool:
+    """
+    Runs searches in ``workers`` local worker processes (see app/scraper/worker.py).
+
+    Jobs go onto a queue shared by all workers, so each search is picked up by
+    the next idle one. A dispatcher thread routes progress events back to the
+    submitting CrawlJob and replaces workers that die mid-crawl (e.g. a Chrome
+    memory blowup), failing the job they were running.
+    """
+    def __init__(self, workers: int):
+        self.size = workers
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = None
+        self._events = None
+        self._processes: Dict[int, Any] = {}
+        self._controls: Dict[int, Any] = {}
+        self._running: Dict[int, CrawlJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self):
+        if self._dispatcher is not None:
+            return
+
+        self._jobs = self._context.Queue()
+        self._events = self._context.Queue()
+        for worker_id in range(self.size):
+            self._spawn(worker_id)
+        self._dispatcher = threading.Thread(target=self._dispatch, name='crawl-dispatcher', daemon=True)
+        self._dispatcher.start()
 
-        # Run Booking.com spider with optional parameters
-        booking_deferred = self.runner.crawl(
-            BookingSpider,
-            city=search_params.get('city', "Dhaka"),
-            check_in=search_params.get('check_in', default_check_in),
-            check_out=search_params.get('check_out', default_check_out),
-            adults=search_params.get('adults', 2),
-            children=search_params.get('children', 0),
-            rooms=search_params.get('rooms', 1),
-            min_price=search_params.get('min_price', 0),
-            max_price=search_params.get('max_price', 100000),
-            star_rating=search_params.get('star_rating', 5),
-            collect_item=collect_item
+    def _spawn(self, worker_id: int):
+        control = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main,
+            args=(worker_id, self._jobs, self._events, control),
+            name=f'crawl-worker-{worker_id}',
+            daemon=True,
         )
+        process.start()
+        self._processes[worker_id] = process
+        self._controls[worker_id] = control
+
+    def submit(self, spider_kwargs: Dict[str, Any], timeout: float) -> CrawlJob:
+        self.start()
+        job = CrawlJob(next(self._ids), asyncio.get_running_loop())
+        with self._lock:
+            self._running[job.id] = job
+        self._jobs.put((job.id, spider_kwargs, timeout))
+        return job
+
+    def cancel(self, job: CrawlJob):
+        with self._lock:
+            job.cancelled = True
+            worker_id = job.worker_id
+        # A job still in the queue is cancelled when a worker reports it started
+        if worker_id is not None:
+            self._controls[worker_id].put(job.id)
+
+    def _dispatch(self):
+        while not self._stopping:
+            try:
+                event = self._events.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            kind, job_id = event[0], event[1]
+            with self._lock:
+                job = self._running.get(job_id)
+                if job is None:
+                    continue
+                if kind == 'started':
+                    job.worker_id = event[2]
+                    if job.cancelled:
+                        self._controls[job.worker_id].put(job.id)
+                    continue
+                if kind in ('done', 'failed'):
+                    del self._running[job_id]
+            job._deliver(event[:1] + event[2:])
+
+    @staticmethod
+    def _kill_process_group(process):
+        """
+        Kill whatever is left in a dead worker's process group: the Chrome and
+        chromedriver processes it would have closed had it exited cleanly.
+        """
+        if process.pid is None or not hasattr(os, 'killpg'):
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # Nothing left
+
+    def _check_workers(self):
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive() or self._stopping:
+                continue
+
+            logger.warning(f"Crawl worker {worker_id} exited with code {process.exitcode}, restarting it")
+            with self._lock:
+                lost = [job for job in self._running.values() if job.worker_id == worker_id]
+                for job in lost:
+                    del self._running[job.id]
+            for job in lost:
+                job._deliver(('failed', f"Crawl worker exited with code {process.exitcode}"))
+            self._kill_process_group(process)
+            self._spawn(worker_id)
+
+    def stop(self, timeout: float = 10.0):
+        """Ask every worker to finish its current job and exit; terminate stragglers."""
+        if self._dispatcher is None:
+            return
+
+        self._stopping = True
+        for worker_id in self._processes:
+            self._jobs.put(None)
+            self._controls[worker_id].put(None)
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+            # A terminated worker never got to close its browsers
+            self._kill_process_group(process)
+        self._dispatcher.join(timeout)
+        self._processes.clear()
+        self._controls.clear()
+        self._dispatcher = None
+        self._stopping = False
+
+class ScrapySearchService:
+    """
+    Thin client over the crawl worker pool: submits a search as a job and
+    awaits its results without blocking the event loop.
+    """
+    def __init__(self, workers: int = 2):
+        self.pool = CrawlWorkerPool(workers)
+
+    def start(self):
+        self.pool.start()
+
+    def stop(self):
+        self.pool.stop()
+
+    def submit(self, search_params: Dict[str, Any], timeout: float = SEARCH_TIMEOUT) -> CrawlJob:
+        """Queue a crawl for ``search_params`` and return its handle immediately."""
+        return self.pool.submit(resolve_search_params(search_params), timeout)
+
+    def cancel(self, job: CrawlJob):
+        self.pool.cancel(job)
+
+    async def watch(self, job: CrawlJob,
+                    timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Yield ``(source, error)`` as each source of ``job`` finishes (``error`` is
+        None on success). The job is cancelled if the caller stops listening early.
+
+        Raises:
+            asyncio.TimeoutError: If the job does not finish within ``timeout`` seconds
+            CrawlError: If the crawl failed in its worker
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        finished = False
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+                event = await asyncio.wait_for(job.events.get(), remaining)
+
+                if event[0] == 'source':
+                    yield event[1], event[2]
+                elif event[0] == 'done':
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise CrawlError(event[1])
+        finally:
+            if not finished:
+                self.cancel(job)
+
+    async def search(self, search_params: Dict[str, Any], timeout: float = SEARCH_TIMEOUT) -> List[HotelListing]:
+        """
+        Run the spiders and return the scraped items.
+
+        Raises:
+            asyncio.TimeoutError: If the crawl does not finish within ``timeout`` seconds
+            CrawlError: If the crawl failed in its worker
+        """
+        job = self.submit(search_params, timeout)
+        async for _ in self.watch(job, timeout):
+            pass
+        return job.items
 
-        return DeferredList([agoda_deferred, booking_deferred])
+    async def stream(self, search_params: Dict[str, Any],
+                     timeout: float = SEARCH_TIMEOUT) -> AsyncIterator[Tuple[str, List[HotelListing]]]:
+        """
+        Run the spiders and yield ``(source, items_so_far)`` each time one of them finishes,
+        so callers can show the fastest source's results without waiting for the slowest.
 
-    def get_items(self):
-        return self.items # Return empty list if no items found
\ No newline at end of file
+        Raises:
+            asyncio.TimeoutError: If the crawl does not finish within ``timeout`` seconds
+            CrawlError: If the crawl failed in its worker
+        """
+        job = self.submit(search_params, timeout)
+        async for source, _ in self.watch(job, timeout):
+            yield source, list(job.items)
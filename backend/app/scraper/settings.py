@@ -1,3 +1,5 @@
+import os
+
 BOT_NAME = 'hotel_scraper'
 
 SPIDER_MODULES = ['app.scraper.spiders']
@@ -12,9 +14,46 @@ CONCURRENT_REQUESTS = 1
 # Configure a delay for requests for the same website
 DOWNLOAD_DELAY = 3
 
-# Enable Selenium middleware
+# Render requests flagged with meta['selenium'] in a pooled browser
 DOWNLOADER_MIDDLEWARES = {
-    'scrapy_selenium.SeleniumMiddleware': 800
+    'app.scraper.middlewares.PageCaptureMiddleware': 580,
+    'app.scraper.middlewares.SeleniumMiddleware': 800
+}
+
+# Record/replay of results pages (see app/scraper/captures.py): 'record' saves
+# every results page the spiders parse, compressed, under PAGE_CAPTURE_DIR;
+# 'replay' serves those pages back with no browser and no network. Empty is off.
+PAGE_CAPTURE_MODE = os.environ.get('SCRAPER_CAPTURE_MODE', '')
+PAGE_CAPTURE_DIR = os.environ.get('SCRAPER_CAPTURE_DIR', 'captures')
+
+# Tiered fetching (see app/scraper/fetch.py), per spider: results pages are first
+# fetched with a plain HTTP request and only re-rendered in a browser when none of
+# the marker selectors match the returned HTML. Set http_first to False to always
+# use the browser.
+TIERED_FETCH = {
+    'booking': {
+        'http_first': True,
+        'markers': ['[data-testid="property-card"]'],
+    },
+    'agoda': {
+        'http_first': True,
+        'markers': ['[data-selenium="hotel-item"]'],
+    },
+}
+
+# Result pages beyond the first are requested alongside it through a paging URL
+# parameter: page i (0-based) gets param=first + i * step
+RESULT_PAGING = {
+    'booking': {'param': 'offset', 'first': 0, 'step': 25},
+    'agoda': {'param': 'page', 'first': 1, 'step': 1},
+}
+MAX_RESULT_PAGES = 5  # Upper bound for the max_pages search parameter
+
+# Headers for the plain HTTP tier, close to what a desktop browser sends
+HTTP_FETCH_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
 }
 
 # Selenium settings
@@ -29,6 +68,59 @@ SELENIUM_DRIVER_ARGUMENTS = [
     '--disable-blink-features=AutomationControlled'
 ]
 
+# Resource blocking (see app/scraper/blocking.py), applied through CDP
+# Network.setBlockedURLs to every browser in the pool. The scrapers only need the
+# DOM (card text, img src attributes, hrefs), so nothing below has to load.
+RESOURCE_BLOCKING_ENABLED = True
+BLOCKED_RESOURCE_TYPES = ['Image', 'Font', 'Stylesheet', 'Media']
+# setBlockedURLs matches URLs only, so each blocked type maps to URL patterns
+RESOURCE_TYPE_URL_PATTERNS = {
+    'Image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'Font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+    'Stylesheet': ['*.css*'],
+    'Media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*'],
+}
+# Third-party trackers, ads and widgets
+BLOCKED_URL_PATTERNS = [
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*doubleclick.net*',
+    '*googlesyndication.com*',
+    '*facebook.net*',
+    '*connect.facebook.com*',
+    '*hotjar.com*',
+    '*criteo.com*',
+    '*criteo.net*',
+    '*bing.com/bat*',
+    '*adnxs.com*',
+    '*taboola.com*',
+    '*newrelic.com*',
+    '*nr-data.net*',
+]
+# Count blocked/allowed requests per rendered page from Chrome's performance log
+RESOURCE_BLOCKING_STATS = True
+
+# Shared pool of warm browsers (see app/scraper/driver_pool.py)
+WEBDRIVER_POOL_SIZE = 2  # Upper bound on concurrent Chrome processes
+WEBDRIVER_MAX_USES = 20  # Recycle a browser after this many borrows
+WEBDRIVER_ACQUIRE_TIMEOUT = 60  # Seconds to wait for a free browser
+
+# Upper bounds (in seconds) for the condition-driven browser waits. Each wait
+# returns as soon as its condition holds; these only cap slow pages.
+WAIT_TIMEOUTS = {
+    'page_load': 15,        # Home/search page is interactive
+    'suggestions': 10,      # City autocomplete suggestions appear
+    'search_redirect': 15,  # Search submitted and the results URL is known
+    'results': 20,          # First result cards rendered
+    'scroll_step': 3,       # New cards loaded after one scroll
+    'cards_settle': 10,     # Card count stops changing
+}
+WAIT_POLL_INTERVAL = 0.25
+CARD_COUNT_SETTLE_TIME = 1.0  # Seconds the card count must hold steady
+
+# Agoda city codes learned from the search UI, seeded from city_codes.CITY_CODES
+CITY_CODE_CACHE_PATH = os.environ.get('AGODA_CITY_CODE_CACHE', 'agoda_city_codes.json')
+
 # Configure item pipelines
 ITEM_PIPELINES = {
     'app.scraper.pipelines.HotelScraperPipeline': 300,
@@ -42,11 +134,16 @@ FEED_EXPORT_ENCODING = "utf-8"
 # Custom settings for different sites
 CUSTOM_SETTINGS = {
     'booking.com': {
+        # Every result page at once; each page has its own download slot, so the
+        # delay spaces requests per page (see TieredFetchMixin.page_requests)
+        'CONCURRENT_REQUESTS': MAX_RESULT_PAGES,
         'DOWNLOAD_DELAY': 2,  # Be more gentle with Booking.com
         'COOKIES_ENABLED': True,
         'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     },
     'agoda.com': {
+        # As for Booking.com; browser renders are further bounded by WEBDRIVER_POOL_SIZE
+        'CONCURRENT_REQUESTS': MAX_RESULT_PAGES,
         'DOWNLOAD_DELAY': 2,  # Be more gentle with Agoda
         'COOKIES_ENABLED': True,
         'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -69,6 +166,8 @@ CRAWLER_PROCESS = {
 }
 
 # Configure the pipeline
+PIPELINE_BATCH_SIZE = 50  # Items handed downstream per items_batch signal
+PIPELINE_LOG_LEVEL = 'DEBUG'
 PIPELINE = {
     'LOG_LEVEL': 'DEBUG',
     'LOG_FORMAT': '%(asctime)s [%(name)s] %(levelname)s: %(message)s',
@@ -1,20 +1,29 @@
 import scrapy
-from scrapy.http import HtmlResponse
-from typing import Optional, Callable
+from scrapy.exceptions import CloseSpider
+from twisted.internet.threads import deferToThread
+from typing import Optional
 from datetime import datetime, date, timedelta
 from urllib.parse import quote, urlparse, parse_qs
 
-import time
-
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException
+
+from app.scraper.captures import page_captures
+from app.scraper.city_codes import city_code_resolver
+from app.scraper.driver_pool import driver_pool
+from app.scraper.fetch import TieredFetchMixin
+from app.scraper.extractors import agoda_extractor
+from app.scraper.settings import CUSTOM_SETTINGS, WAIT_TIMEOUTS, WAIT_POLL_INTERVAL
+from app.scraper.waits import WaitTimings, wait_until
+
+HOTEL_CARD_SELECTOR = '[data-selenium="hotel-item"]'
 
-class AgodaSpider(scrapy.Spider):
+class AgodaSpider(TieredFetchMixin, scrapy.Spider):
     name = 'agoda'
+    custom_settings = CUSTOM_SETTINGS['agoda.com']
     
     def __init__(self, city: Optional[str] = None,
                  check_in: Optional[str] = None,
@@ -25,7 +34,7 @@ class AgodaSpider(scrapy.Spider):
                  min_price: Optional[float] = 0, 
                  max_price: Optional[float] = 50000, 
                  star_rating: Optional[int] = 5,
-                 collect_item: Optional[Callable] = None,
+                 max_pages: int = 1,
                  *args, **kwargs):
         super().__init__(*args, **kwargs)
         
@@ -57,7 +66,7 @@ class AgodaSpider(scrapy.Spider):
         self.min_price = min_price
         self.max_price = max_price
         self.star_rating = star_rating
-        self.collect_item = collect_item
+        self.max_pages = max_pages
         
         # Format the Agoda search URL
         self.start_url = (
@@ -76,140 +85,156 @@ class AgodaSpider(scrapy.Spider):
         if self.star_rating is not None:
             self.start_url += f'&hotelStarRating={self.star_rating}'
 
-        options = Options()
-        self.driver = webdriver.Chrome(options=options)
+        # Borrowed from the shared pool while discovering the city code
+        self.driver = None
 
     def start_requests(self):
-        self.driver.get("https://www.agoda.com/")
+        city_code = city_code_resolver.get(self.city)
+        if page_captures.replaying:
+            # The code the search was recorded with, so the page URLs match
+            city_code = page_captures.recall(self, 'city_code') or city_code
+        if city_code is not None:
+            yield from self.results_requests(city_code)
+            return
+
+        # Unknown cities need the homepage search UI, which blocks. This request
+        # only gives Scrapy a callback that can hand the browser work to a thread,
+        # so the reactor stays free to run other searches' crawls in the meantime.
+        yield scrapy.Request('data:,', callback=self.resolve_city, dont_filter=True)
+
+    async def resolve_city(self, response):
+        city_code = await deferToThread(self.discover_city_code_pooled)
+        if city_code is None:
+            # Crawling some other city would pass its hotels off as this one's
+            raise CloseSpider(f'unknown_city: {self.city}')
+        city_code_resolver.remember(self.city, city_code)
+        for request in self.results_requests(city_code):
+            yield request
+
+    def discover_city_code_pooled(self) -> Optional[str]:
+        if page_captures.replaying:
+            return None  # No browser while replaying
+
+        with driver_pool.driver() as driver:
+            self.driver = driver
+            try:
+                return self.discover_city_code(WaitTimings(self))
+            except Exception as e:
+                self.logger.warning(f"Could not discover the Agoda city code for {self.city}: {e!r}")
+                return None
+            finally:
+                self.driver = None
+
+    def results_requests(self, city_code: str):
+        self.city_code = city_code
+        if page_captures.recording:
+            # Lets a replay find the code without the resolver cache or a browser
+            page_captures.note(self, 'city_code', city_code)
+        self.logger.debug(f"Agoda city code for {self.city}: {self.city_code}")
+        self.start_url = self.start_url + f'&city={self.city_code}'
+        yield from self.page_requests(self.start_url, self.max_pages, callback=self.parse_results)
 
-        time.sleep(3)  # Give it some time to load (you can make this smarter with WebDriverWait)
+    def parse_results(self, response):
+        if self.needs_browser(response):
+            yield self.escalate(response.request, 'no hotel cards in the HTML')
+            return
+
+        yield from self.parse_cards(response)
+
+    def discover_city_code(self, waits: WaitTimings) -> Optional[str]:
+        """Find the Agoda city code by searching for the city on the homepage."""
+        self.driver.get("https://www.agoda.com/")
 
         # 3. Find the search field and type city name
-        search_field = self.driver.find_element(By.CSS_SELECTOR, 'input[data-selenium="textInput"]')
+        with waits.phase('page_load'):
+            search_field = WebDriverWait(self.driver, WAIT_TIMEOUTS['page_load'], poll_frequency=WAIT_POLL_INTERVAL).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'input[data-selenium="textInput"]'))
+            )
         search_field.send_keys(self.city)  # You can change 'Dhaka' to any city
-        time.sleep(1)
-
-        
-        # Simulate pressing down arrow and enter to select first result
-        suggestion = WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'li[data-selenium="suggestion-category-name"]'))
-        )
 
+        # Pick the first suggestion once the autocomplete list shows up
+        with waits.phase('suggestions'):
+            suggestion = WebDriverWait(self.driver, WAIT_TIMEOUTS['suggestions'], poll_frequency=WAIT_POLL_INTERVAL).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'li[data-selenium="suggestion-category-name"]'))
+            )
         suggestion.click()
-        time.sleep(1)
 
-        checkin_box = self.driver.find_element(By.CSS_SELECTOR, 'div[data-element-name="check-in-box"]')
+        with waits.phase('page_load'):
+            checkin_box = WebDriverWait(self.driver, WAIT_TIMEOUTS['page_load'], poll_frequency=WAIT_POLL_INTERVAL).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[data-element-name="check-in-box"]'))
+            )
         checkin_box.click()
-        time.sleep(1)
-        
 
         # 4. Press Enter key to search
-        search_button = self.driver.find_element(By.CSS_SELECTOR, 'button[data-selenium="searchButton"]')
+        with waits.phase('page_load'):
+            search_button = WebDriverWait(self.driver, WAIT_TIMEOUTS['page_load'], poll_frequency=WAIT_POLL_INTERVAL).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-selenium="searchButton"]'))
+            )
         search_button.click()
 
-        # 5. Wait for page to load (again, better with WebDriverWait)
-        time.sleep(5)
+        # 5. Wait until the search has redirected to a results URL carrying the city
+        with waits.phase('search_redirect'):
+            wait_until(self.driver, EC.url_contains('city='), WAIT_TIMEOUTS['search_redirect'])
 
         # 6. Get current URL
         current_url = self.driver.current_url
-        print("Current URL:", current_url)
+        self.logger.debug(f"Search redirected to {current_url}")
 
         # 7. Extract city param from URL
         parsed_url = urlparse(current_url)
         query_params = parse_qs(parsed_url.query)
 
         # Some Agoda URLs have 'city' param, some have other structure
-        self.city_code = query_params.get('city', '1390')[0]
-        print("City search param:", self.city_code)
-
-        self.start_url = self.start_url + f'&city={self.city_code}'
-
-        self.driver.get(self.start_url)
+        city_codes = query_params.get('city')
+        return city_codes[0] if city_codes else None
+
+    def prepare_page(self, driver, waits: WaitTimings):
+        """
+        Called by SeleniumMiddleware on a rendered results page: scroll down to
+        the list separator so the lazy-loaded cards below the fold render too.
+        """
+        with waits.phase('results'):
+            wait_until(
+                driver,
+                EC.presence_of_element_located((By.CSS_SELECTOR, HOTEL_CARD_SELECTOR)),
+                WAIT_TIMEOUTS['results']
+            )
 
         separator_found = False
-        scroll_pause_time = 2
         max_scroll_attempts = 10  # Prevent infinite scrolling
         scroll_attempts = 0
 
         while not separator_found and scroll_attempts < max_scroll_attempts:
             try:
-                separator_element = self.driver.find_element(By.CSS_SELECTOR, '.ListSeparator')
+                separator_element = driver.find_element(By.CSS_SELECTOR, '.ListSeparator')
                 separator_found = True
                 # Scroll the separator element into view
-                self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'start'});", separator_element)
-                time.sleep(1)  # Give time for smooth scroll to complete
-            except:
-                # Scroll by a larger amount
-                self.driver.execute_script("window.scrollBy(0, 800)")
-                time.sleep(scroll_pause_time)
+                driver.execute_script("arguments[0].scrollIntoView({block: 'start'});", separator_element)
+            except NoSuchElementException:
+                # Scroll by a larger amount, then wait for either the separator
+                # or more cards to show up instead of a fixed pause
+                card_count = len(driver.find_elements(By.CSS_SELECTOR, HOTEL_CARD_SELECTOR))
+                driver.execute_script("window.scrollBy(0, 800)")
+                with waits.phase('scroll'):
+                    wait_until(
+                        driver,
+                        lambda driver: driver.find_elements(By.CSS_SELECTOR, '.ListSeparator') or
+                            len(driver.find_elements(By.CSS_SELECTOR, HOTEL_CARD_SELECTOR)) > card_count,
+                        WAIT_TIMEOUTS['scroll_step']
+                    )
                 scroll_attempts += 1
 
         if not separator_found:
-            print("Warning: Could not find separator element after maximum scroll attempts")
-
-        time.sleep(5)
-
-        # Debug: Try to find elements using Selenium first
-        try:
-            # Get the entire page source
-            html = self.driver.page_source
-
-            # Pass it to Scrapy-style parser
-            response = HtmlResponse(url=self.start_url, body=html, encoding='utf-8')
-            
-            # Debug: Check if the selector exists
-            container = response.css('div#sort-bar + div')
-            hotel_cards = container.css('[data-selenium="hotel-item"]')
-            print(f"Found {len(hotel_cards)} hotels using Scrapy")
-            
-            if not hotel_cards:
-                print("No hotel cards found by Scrapy")
-                return
-                
-            # Process each hotel card
-            for hotel in hotel_cards:
-                try:
-                    name = hotel.css('[data-selenium="hotel-name"]::text').get()
-                    price_text = hotel.css('[data-selenium="display-price"]::text').get()
-                    rating = len(hotel.css('[data-testid="rating-container"] svg').getall())
-                    image = hotel.css('[data-element-name="ssrweb-mainphoto"] img::attr(src)').get()
-                    booking_url = hotel.css('[data-element-name="property-card-content"]::attr(href)').get()
-                    
-                    print(price_text)
-                    # Convert price to float
-                    price = float(price_text.replace('BDT', '').replace(',', '').strip())
-                    
-                    # Apply filters
-                    if (self.min_price and price < self.min_price) or \
-                       (self.max_price and price > self.max_price) or \
-                       (self.star_rating and rating != self.star_rating):
-                        continue
-                    
-                    # Make sure booking_url is absolute
-                    booking_url = response.urljoin(booking_url)
-                    
-                    item = {
-                        'hotel_name': name,
-                        'price': price,
-                        'rating': rating,
-                        'image': image,
-                        'booking_url': booking_url,
-                        'source': 'agoda'
-                    }
-
-                    print(item)
-
-                    if self.collect_item:
-                        self.collect_item(item)
-                except Exception as e:
-                    print(f"Error processing hotel: {str(e)}")
-                    continue
-
-            yield None
-
-        except Exception as e:
-            print(f"Error finding hotel cards with Selenium: {str(e)}")
-        finally:
-            self.driver.quit()
-            
-
+            self.logger.warning("Could not find the list separator after the maximum scroll attempts")
+
+    def parse_cards(self, response):
+        hotels = agoda_extractor.extract(response.body, response.url, response.encoding)
+        self.logger.debug(f"Found {len(hotels)} hotels on {response.url}")
+
+        # Apply filters
+        return [
+            hotel for hotel in hotels
+            if not ((self.min_price and hotel.price < self.min_price) or
+                    (self.max_price and hotel.price > self.max_price) or
+                    (self.star_rating and hotel.rating != self.star_rating))
+        ]
@@ -1,19 +1,15 @@
 import scrapy
-from scrapy.http import HtmlResponse
-from typing import Optional, Callable
+from typing import Optional
 from datetime import datetime, date, timedelta
 from urllib.parse import quote
 
-import time
+from app.scraper.fetch import TieredFetchMixin
+from app.scraper.extractors import booking_extractor
+from app.scraper.settings import CUSTOM_SETTINGS
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-class BookingSpider(scrapy.Spider):
+class BookingSpider(TieredFetchMixin, scrapy.Spider):
     name = 'booking'
+    custom_settings = CUSTOM_SETTINGS['booking.com']
     
     def __init__(self, city: Optional[str] = None,
                  check_in: Optional[str] = None,
@@ -24,7 +20,7 @@ class BookingSpider(scrapy.Spider):
                  min_price: Optional[float] = None, 
                  max_price: Optional[float] = None, 
                  star_rating: Optional[int] = None,
-                 collect_item: Optional[Callable] = None,
+                 max_pages: int = 1,
                  *args, **kwargs):
         super().__init__(*args, **kwargs)
         
@@ -56,7 +52,7 @@ class BookingSpider(scrapy.Spider):
         self.min_price = min_price
         self.max_price = max_price
         self.star_rating = star_rating
-        self.collect_item = collect_item
+        self.max_pages = max_pages
 
         # # Format the Booking.com search URL
         self.start_url = (
@@ -75,76 +71,26 @@ class BookingSpider(scrapy.Spider):
         if self.star_rating is not None:
             self.start_url += f'%3Bclass%3D{self.star_rating}'
 
-        options = Options()
-        self.driver = webdriver.Chrome(options=options)
-
     def start_requests(self):
-        self.driver.get(self.start_url)
-
-        # Wait for the page to load
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="property-card"]'))
-        )
-
-        # Debug: Try to find elements using Selenium first
-        try:
-            html = self.driver.page_source
-
-            # # Pass it to Scrapy-style parser
-            response = HtmlResponse(url=self.start_url, body=html, encoding='utf-8')
-            
-            # # Debug: Check if the selector exists
-            hotel_cards = response.css('[data-testid="property-card"]')
-            print(f"Found {len(hotel_cards)} hotels using Scrapy")
-            
-            if not hotel_cards:
-                print("No hotel cards found by Scrapy")
-                return
-                
-            # Process each hotel card
-            for hotel in hotel_cards:
-                try:
-                    name = hotel.css('[data-testid="title"]::text').get()
-                    price_text = hotel.css('[data-testid="price-and-discounted-price"]::text').get()
-                    rating = len(hotel.css('[data-testid="rating-stars"] span').getall())
-                    image = hotel.css('[data-testid="image"]::attr(src)').get()
-                    booking_url = hotel.css('[data-testid="title-link"]::attr(href)').get()
-                    
-                    # Convert price to float
-                    price = float(price_text.replace('BDT', '').replace(',', '').strip())
-                    
-                    
-                    # Apply filters
-                    if (self.min_price and price < self.min_price) or \
-                       (self.max_price and price > self.max_price) or \
-                       (self.star_rating and rating != self.star_rating):
-                        continue
-                    
-                    # Make sure booking_url is absolute
-                    booking_url = response.urljoin(booking_url)
-                    
-                    item = {
-                        'hotel_name': name,
-                        'price': price,
-                        'rating': rating,
-                        'image': image,
-                        'booking_url': booking_url,
-                        'source': 'booking.com'
-                    }
-
-                    print(item, "item")
-
-                    self.collect_item(item)
+        # Booking.com renders result cards server-side, so a plain HTTP request
+        # usually suffices; parse_results escalates to the browser otherwise
+        yield from self.page_requests(self.start_url, self.max_pages, callback=self.parse_results)
 
-                except Exception as e:
-                    print(f"Error processing hotel: {str(e)}")
-                    continue
+    def parse_results(self, response):
+        if self.needs_browser(response):
+            yield self.escalate(response.request, 'no property cards in the HTML')
+            return
 
-            yield None
+        yield from self.parse_cards(response)
 
-        except Exception as e:
-            print(f"Error finding hotel cards with Selenium: {str(e)}")
-        finally:
-            self.driver.quit()
+    def parse_cards(self, response):
+        hotels = booking_extractor.extract(response.body, response.url, response.encoding)
+        self.logger.debug(f"Found {len(hotels)} hotels on {response.url}")
 
-    
\ No newline at end of file
+        # Apply filters
+        return [
+            hotel for hotel in hotels
+            if not ((self.min_price and hotel.price < self.min_price) or
+                    (self.max_price and hotel.price > self.max_price) or
+                    (self.star_rating and hotel.rating != self.star_rating))
+        ]
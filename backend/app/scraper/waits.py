@@ -0,0 +1,69 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from app.scraper.settings import WAIT_POLL_INTERVAL, CARD_COUNT_SETTLE_TIME
+
+logger = logging.getLogger(__name__)
+
+def wait_until(driver, condition: Callable, timeout: float, poll: float = WAIT_POLL_INTERVAL):
+    """
+    Poll ``condition`` until it returns something truthy.
+
+    Returns:
+        The condition's result, or None if ``timeout`` elapsed first
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+    except TimeoutException:
+        return None
+
+def document_ready(driver) -> bool:
+    return driver.execute_script('return document.readyState') == 'complete'
+
+def count_settled(selector: str, settle_time: float = CARD_COUNT_SETTLE_TIME):
+    """
+    Condition that is met once at least one element matches ``selector`` and the
+    number of matches has not changed for ``settle_time`` seconds, i.e. lazy
+    loading has stopped adding cards. Returns the final count.
+    """
+    state = {'count': -1, 'since': time.monotonic()}
+
+    def _condition(driver):
+        count = len(driver.find_elements(By.CSS_SELECTOR, selector))
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return count if count and now - state['since'] >= settle_time else False
+
+    return _condition
+
+class WaitTimings:
+    """
+    Records how long each wait phase took, in the spider's crawl stats
+    (``waits/<source>/<phase>``) and the log.
+    """
+    def __init__(self, spider, source: Optional[str] = None):
+        self.spider = spider
+        self.source = source or spider.name
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            crawler = getattr(self.spider, 'crawler', None)
+            if crawler is not None and crawler.stats is not None:
+                crawler.stats.inc_value(f'waits/{self.source}/{name}', elapsed)
+            logger.debug(f"{self.source}: waited {elapsed:.2f}s for {name}")
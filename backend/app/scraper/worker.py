@@ -0,0 +1,202 @@
+"""
+Crawl worker process.
+
+Each worker runs its own Twisted reactor (via crochet) and its own pool of
+browsers, and executes one search at a time, taken from the job queue shared
+by all workers. Progress is reported back to the API process on the event
+queue as plain tuples:
+
+    ('started', job_id, worker_id)
+    ('source', job_id, source, new_items, error)  # error is None on success
+    ('done', job_id)
+    ('failed', job_id, error)
+"""
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.project import get_project_settings
+from twisted.internet.defer import DeferredList, succeed
+
+from app.scraper import settings as scraper_settings
+from app.scraper.captures import page_captures
+from app.scraper.items import HotelListing
+from app.scraper.pipelines import items_batch
+from app.scraper.spiders.agoda_spider import AgodaSpider
+from app.scraper.spiders.booking_spider import BookingSpider
+
+logger = logging.getLogger(__name__)
+
+# Spiders run for every search, keyed by the ``source`` they put on their items
+SOURCES = {
+    'agoda': AgodaSpider,
+    'booking.com': BookingSpider,
+}
+
+# Seconds a stopped crawl gets to shut down before the worker moves on
+STOP_GRACE_PERIOD = 30.0
+
+def crawler_settings():
+    """
+    Settings for the worker's crawls. app/scraper/settings.py also carries options
+    for running the spiders as a standalone Scrapy project, so only the ones these
+    crawls rely on are picked up here.
+    """
+    settings = get_project_settings()
+    for name in ('ITEM_PIPELINES', 'PIPELINE_BATCH_SIZE', 'PIPELINE_LOG_LEVEL',
+                 'DOWNLOADER_MIDDLEWARES', 'CONCURRENT_REQUESTS', 'DOWNLOAD_DELAY', 'ROBOTSTXT_OBEY'):
+        settings.set(name, getattr(scraper_settings, name), priority='project')
+    if page_captures.replaying:
+        # Replayed pages come from disk; the per-site delays (spider custom_settings)
+        # would only slow the crawl down
+        settings.set('DOWNLOAD_DELAY', 0, priority='cmdline')
+    return settings
+
+class SearchCollector:
+    """
+    Collects the items scraped for a single search invocation.
+
+    Each search gets its own collector, so overlapping searches never see each
+    other's hotels.
+    """
+    def __init__(self, on_source_done: Optional[Callable[[str, List[HotelListing], Optional[str]], None]] = None):
+        self.items: List[HotelListing] = []
+        self.on_source_done = on_source_done
+        # Set in the reactor thread by cancel_crawl
+        self.cancelled = False
+
+    def collect_batch(self, items, spider=None):
+        """``items_batch`` signal handler; receives validated items from the pipeline."""
+        self.items.extend(items)
+
+    def engine_started(self, sender=None):
+        """``engine_started`` handler: a crawler cancelled before its engine ran stops now."""
+        if self.cancelled and sender is not None:
+            sender.stop()
+
+    def source_done(self, result, source: str, crawler=None):
+        """
+        Deferred callback fired (in the reactor thread) when one source's spider
+        finishes; hands on the items that source scraped.
+        A spider that closed itself early (``CloseSpider``) counts as failed.
+        """
+        error = None
+        if hasattr(result, 'getErrorMessage'):
+            error = result.getErrorMessage()
+            result = None  # Reported below; don't fail the other sources
+        elif crawler is not None and crawler.stats is not None:
+            reason = crawler.stats.get_value('finish_reason')
+            if reason not in (None, 'finished', 'shutdown'):
+                error = f"Crawl closed: {reason}"
+        if self.on_source_done:
+            # Other sources' batches keep arriving until they finish too
+            new_items = [item for item in self.items if item.source == source]
+            self.on_source_done(source, new_items, error)
+        return result
+
+def crawl(runner: CrawlerRunner, spider_kwargs: Dict[str, Any], collector: SearchCollector):
+    """Run every source's spider with the same parameters; must be called in the reactor thread."""
+    if collector.cancelled:
+        return succeed(collector.items)
+    deferreds = []
+    for source, spider_cls in SOURCES.items():
+        crawler = runner.create_crawler(spider_cls)
+        crawler.signals.connect(collector.collect_batch, signal=items_batch)
+        crawler.signals.connect(collector.engine_started, signal=signals.engine_started)
+        deferred = runner.crawl(crawler, **spider_kwargs)
+        deferred.addBoth(collector.source_done, source, crawler)
+        deferreds.append(deferred)
+
+    deferred = DeferredList(deferreds)
+    deferred.addCallback(lambda _: collector.items)
+    return deferred
+
+def cancel_crawl(runner: CrawlerRunner, collector: SearchCollector):
+    """
+    Stop a search's crawl; must be called in the reactor thread. It may not have
+    got going yet: ``crawl`` then starts nothing, and crawlers whose engine is
+    still opening stop once it starts (``Crawler.stop`` fails before that).
+    """
+    collector.cancelled = True
+    for crawler in list(runner.crawlers):
+        if crawler.engine is not None and crawler.engine.running:
+            crawler.stop()
+
+def worker_main(worker_id: int, jobs, events, control):
+    """
+    Entry point of a worker process.
+
+    ``jobs`` yields ``(job_id, spider_kwargs, timeout)`` tuples, or None to shut
+    down; ``control`` receives ids of jobs to cancel.
+    """
+    if hasattr(os, 'setsid'):
+        # Lead a process group of our own; the browsers (and their drivers)
+        # started below join it, so the pool can kill them all if this process
+        # dies without closing them
+        os.setsid()
+
+    from crochet import setup, run_in_reactor, TimeoutError as CrochetTimeout
+    from twisted.internet import reactor
+    from app.scraper.driver_pool import driver_pool
+
+    setup()
+    runner = CrawlerRunner(crawler_settings())
+    current = {}
+
+    @run_in_reactor
+    def start_crawl(spider_kwargs, collector):
+        return crawl(runner, spider_kwargs, collector)
+
+    def watch_control():
+        while True:
+            job_id = control.get()
+            if job_id is None:
+                return
+            collector = current.get(job_id)
+            if collector is not None:
+                logger.info(f"Cancelling crawl job {job_id}")
+                reactor.callFromThread(cancel_crawl, runner, collector)
+
+    threading.Thread(target=watch_control, name='crawl-control', daemon=True).start()
+    if not page_captures.replaying:
+        try:
+            driver_pool.warm()
+        except Exception as e:
+            logger.warning(f"Could not warm the browser pool: {e!r}")
+
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+
+            job_id, spider_kwargs, timeout = job
+            collector = SearchCollector(
+                on_source_done=lambda source, new_items, error, job_id=job_id:
+                    events.put(('source', job_id, source, new_items, error))
+            )
+            # Cancellations can only come once the pool has seen 'started', and
+            # may reach the reactor before or after start_crawl
+            current[job_id] = collector
+            events.put(('started', job_id, worker_id))
+            result = start_crawl(spider_kwargs, collector)
+            try:
+                result.wait(timeout)
+                events.put(('done', job_id))
+            except CrochetTimeout:
+                reactor.callFromThread(cancel_crawl, runner, collector)
+                events.put(('failed', job_id, f"Crawl did not finish within {timeout:.0f}s"))
+                # Let the stopped spiders close before taking the next job
+                try:
+                    result.wait(STOP_GRACE_PERIOD)
+                except Exception:
+                    pass
+            except Exception as e:
+                events.put(('failed', job_id, repr(e)))
+            finally:
+                current.pop(job_id, None)
+    finally:
+        driver_pool.close()
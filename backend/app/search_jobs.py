@@ -0,0 +1,147 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from comparator import group_hotels_by_name, organize_hotel_comparison
+
+from .cache import TTLCache, SingleFlight
+from .scraper.items import HotelListing
+from .scraper.runner import CrawlJob, ScrapySearchService, search_cache_key
+from .scraper.worker import SOURCES
+from .serialization import EncodedJSON
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+class SearchJob:
+    """State of one background search, as reported by ``GET /search/jobs/{id}``."""
+    def __init__(self, user_id: int, search_params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.search_params = search_params
+        self.status = PENDING
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.sources: Dict[str, Dict[str, Any]] = {
+            source: {"status": PENDING, "count": 0, "error": None} for source in SOURCES
+        }
+        self.result: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.crawl: Optional[CrawlJob] = None
+
+    def _refresh_status(self):
+        # The crawl only reports per source when it finishes; until then every
+        # unfinished source runs once a worker has picked the job up
+        if self.status == PENDING and self.crawl is not None and self.crawl.worker_id is not None:
+            self.status = RUNNING
+        if self.status == RUNNING:
+            for state in self.sources.values():
+                if state["status"] == PENDING:
+                    state["status"] = RUNNING
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._refresh_status()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "sources": self.sources,
+            "result": self.result,
+            "error": self.error,
+        }
+
+class SearchJobManager:
+    """
+    Runs searches in the background so clients can poll for them instead of
+    holding a request open for the whole crawl.
+
+    A job for a search already in ``cache`` finishes from it at once, and one
+    for a search already being crawled (by ``/search`` or the pre-crawl) joins
+    that crawl through ``flights``; other searches join the job's crawl in turn.
+    Otherwise the comparison is rebuilt each time a source finishes, so polling
+    clients see partial results. Jobs are kept for ``retention`` seconds after
+    they finish (``max_entries`` at most); ``on_complete`` is called with the
+    search params, scraped items and final comparison of every crawl a job runs
+    and returns the encoded result shared with the joined searches.
+    """
+    def __init__(self, service: ScrapySearchService, cache: TTLCache, flights: SingleFlight,
+                 on_complete: Callable[[Dict[str, Any], List[HotelListing], List[Dict[str, Any]]], EncodedJSON],
+                 timeout: float, retention: float, max_entries: int):
+        self.service = service
+        self.cache = cache
+        self.flights = flights
+        self.on_complete = on_complete
+        self.timeout = timeout
+        self.retention = retention
+        self._jobs = TTLCache(retention, max_entries)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def create(self, user_id: int, search_params: Dict[str, Any]) -> SearchJob:
+        job = SearchJob(user_id, search_params)
+        # Running jobs must outlive their crawl; the retention clock starts when they finish
+        self._jobs.set(job.id, job, ttl=self.timeout + self.retention)
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str, user_id: int) -> Optional[SearchJob]:
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def _run(self, job: SearchJob):
+        cache_key = search_cache_key(job.search_params)
+        try:
+            response = self.cache.get(cache_key)
+            if response is None:
+                if cache_key in self.flights:
+                    job.status = RUNNING
+                response = await self.flights.run(cache_key, lambda: self._crawl(job))
+            if job.crawl is None:
+                # Answered by the cache or by a crawl started elsewhere
+                self._finish_from(job, response.content["result"])
+            job.status = DONE
+        except asyncio.TimeoutError:
+            self._fail(job, "The search operation took too long to complete.")
+        except Exception as e:
+            self._fail(job, f"An error occurred during the search: {str(e)}")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._jobs.set(job.id, job)
+
+    async def _crawl(self, job: SearchJob) -> EncodedJSON:
+        job.crawl = self.service.submit(job.search_params, self.timeout)
+        async for source, error in self.service.watch(job.crawl, self.timeout):
+            job.status = RUNNING
+            job.sources[source].update(
+                status=FAILED if error else DONE,
+                count=sum(1 for item in job.crawl.items if item.source == source),
+                error=error,
+            )
+            job.result = organize_hotel_comparison(group_hotels_by_name(job.crawl.items))
+        return self.on_complete(job.search_params, job.crawl.items, job.result)
+
+    @staticmethod
+    def _finish_from(job: SearchJob, result: List[Dict[str, Any]]):
+        job.result = result
+        for source, state in job.sources.items():
+            state.update(
+                status=DONE,
+                count=sum(1 for hotel in result for offer in hotel["sources"] if offer["source"] == source),
+            )
+
+    @staticmethod
+    def _fail(job: SearchJob, error: str):
+        job.status = FAILED
+        job.error = error
+        for state in job.sources.values():
+            if state["status"] in (PENDING, RUNNING):
+                state["status"] = FAILED
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,53 @@
+import hashlib
+import json
+from typing import Any, NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+FAST_JSON = settings.FAST_JSON and orjson is not None
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode ``content`` (plain dicts/lists, datetimes, pydantic models) to JSON bytes.
+
+    With FAST_JSON the payload goes straight to orjson, which handles
+    datetimes and dataclasses natively; otherwise it takes the usual
+    jsonable_encoder + json route.
+    """
+    if FAST_JSON:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _orjson_default(value: Any) -> Any:
+    # Anything orjson does not know natively (pydantic models, sets, ...)
+    return jsonable_encoder(value)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through ``dumps``; the app's default response class."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> FastJSONResponse:
+    """
+    Build a response from already-plain data, bypassing response_model validation
+    and FastAPI's jsonable_encoder pass.
+    """
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+class EncodedJSON(NamedTuple):
+    """A payload together with its encoded body and content-hash ETag."""
+    content: Any
+    body: bytes
+    etag: str
+
+def encode_json(content: Any) -> EncodedJSON:
+    body = dumps(content)
+    return EncodedJSON(content, body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
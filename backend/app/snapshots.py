@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Set
+
+from prisma import Prisma
+
+from .scraper.items import HotelListing
+from .scraper.runner import resolve_search_params
+
+logger = logging.getLogger(__name__)
+
+_pending: Set[asyncio.Task] = set()
+
+def snapshot_rows(items: List[HotelListing], search_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn scraped items into ``HotelPriceSnapshot`` rows for the search they came from."""
+    resolved = resolve_search_params(search_params)
+    city = resolved['city'].strip().lower()
+    check_in = datetime.strptime(resolved['check_in'], '%Y-%m-%d')
+    check_out = datetime.strptime(resolved['check_out'], '%Y-%m-%d')
+
+    rows = []
+    for item in items:
+        if not item.hotel_name or item.price is None:
+            continue
+        rows.append({
+            "source": item.source,
+            "hotelName": item.hotel_name,
+            "normalizedName": item.normalized_name,
+            "price": float(item.price),
+            "rating": float(item.rating or 0),
+            "image": item.image or None,
+            "bookingUrl": item.booking_url,
+            "city": city,
+            "checkIn": check_in,
+            "checkOut": check_out,
+        })
+    return rows
+
+async def save_snapshots(db: Prisma, items: List[HotelListing], search_params: Dict[str, Any],
+                         batch_size: int = 500) -> int:
+    """Write price snapshots with one ``create_many`` per ``batch_size`` rows."""
+    rows = snapshot_rows(items, search_params)
+    for start in range(0, len(rows), batch_size):
+        await db.hotelpricesnapshot.create_many(data=rows[start:start + batch_size])
+    return len(rows)
+
+def save_snapshots_in_background(db: Prisma, items: List[HotelListing], search_params: Dict[str, Any],
+                                 batch_size: int = 500):
+    """Schedule ``save_snapshots`` without making the caller wait on the database."""
+    async def _save():
+        try:
+            await save_snapshots(db, items, search_params, batch_size)
+        except Exception as e:
+            logger.warning(f"Could not save {len(items)} price snapshots: {e!r}")
+
+    task = asyncio.ensure_future(_save())
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -0,0 +1,194 @@
+"""
+Benchmarks for the hotel comparison pipeline.
+
+Generates synthetic listings with controlled name noise across several sources
+and times ``normalize_hotel_name``, ``group_hotels_by_name`` and
+``organize_hotel_comparison`` at each size, reporting throughput and peak memory.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_comparator                      # 100 .. 100k listings
+    python -m benchmarks.bench_comparator --sizes 100 1000     # quicker run
+    python -m benchmarks.bench_comparator --save-baseline      # record baselines
+    python -m benchmarks.bench_comparator --check              # exit 1 on regressions
+
+Baselines are machine specific; record them on the machine that runs ``--check``.
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from app.scraper.items import HotelListing
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+# Module under test -> how it wants its listings
+TARGETS = {
+    'comparator': lambda listings: listings,
+    'app.comparator': lambda listings: [listing.to_dict() for listing in listings],
+}
+SOURCES = ['agoda', 'booking.com', 'expedia', 'hotels.com']
+
+_NAME_WORDS = [
+    'grand', 'royal', 'palace', 'sea', 'view', 'pacific', 'sonargaon', 'blu', 'water',
+    'garden', 'lake', 'shore', 'amari', 'meridien', 'bay', 'tulip', 'golden', 'sands',
+    'long', 'beach', 'ocean', 'paradise', 'hill', 'top', 'star', 'city', 'park', 'plaza',
+    'regency', 'crown', 'orchid', 'lotus', 'pearl', 'emerald', 'silver', 'heritage',
+]
+_KINDS = ['Hotel', 'Resort', 'Inn', 'Suites', 'Residency', 'Guest House']
+_CITIES = ['Dhaka', 'Chittagong', "Cox's Bazar", 'Sylhet']
+
+def _typo(rng: random.Random, name: str) -> str:
+    if len(name) < 4:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    op = rng.random()
+    if op < 0.33:
+        return name[:i] + name[i + 1:]  # Dropped letter
+    if op < 0.66:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]  # Swapped letters
+    return name[:i] + rng.choice('aeiou') + name[i + 1:]  # Wrong vowel
+
+def _noisy_name(rng: random.Random, base: str, city: str, noise: float) -> str:
+    name = base
+    if rng.random() < noise:
+        name = f"Hotel {name}"
+    if rng.random() < noise:
+        name = f"{name}, {city}"
+    if rng.random() < noise:
+        name = name.replace(' ', rng.choice([' - ', ' & ', "' ", ' '] ), 1)
+    if rng.random() < noise / 2:
+        name = _typo(rng, name)
+    if rng.random() < noise / 2:
+        name = name.upper() if rng.random() < 0.5 else name.lower()
+    return name
+
+def generate_listings(size: int, noise: float = 0.5, seed: int = 42) -> List[HotelListing]:
+    """
+    Build ``size`` listings of roughly ``size / len(SOURCES)`` distinct hotels, each
+    listed by several sources under a noisy variant of its name.
+    """
+    rng = random.Random(seed)
+    listings = []
+    while len(listings) < size:
+        words = rng.sample(_NAME_WORDS, rng.randint(1, 3))
+        base = ' '.join(word.title() for word in words) + ' ' + rng.choice(_KINDS)
+        city = rng.choice(_CITIES)
+        price = round(rng.uniform(1500, 40000), 2)
+        for source in rng.sample(SOURCES, rng.randint(1, len(SOURCES))):
+            listings.append(HotelListing(
+                hotel_name=_noisy_name(rng, base, city, noise),
+                price=round(price * rng.uniform(0.9, 1.1), 2),
+                rating=rng.randint(1, 5),
+                image=f"//cdn.example.com/{source}/{len(listings)}.jpg",
+                booking_url=f"https://{source}/hotel/{len(listings)}",
+                source=source,
+            ))
+    return listings[:size]
+
+def _reset_caches(module):
+    cache_clear = getattr(getattr(module, 'normalize_hotel_name', None), 'cache_clear', None)
+    if cache_clear:
+        cache_clear()
+
+def _measure(func: Callable[[], Any], repeat: int, reset: Callable[[], None]) -> Dict[str, float]:
+    """Best wall time over ``repeat`` runs, plus peak traced memory of one extra run."""
+    best = float('inf')
+    for _ in range(repeat):
+        reset()
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    reset()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+def run(sizes: List[int], noise: float, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for target, prepare in TARGETS.items():
+        module = importlib.import_module(target)
+        for size in sizes:
+            generated = generate_listings(size, noise, seed)
+            names = [listing.hotel_name for listing in generated]
+            listings = prepare(generated)
+            grouped = module.group_hotels_by_name(listings)
+            reset = lambda: _reset_caches(module)
+
+            cases = {'group_hotels_by_name': lambda: module.group_hotels_by_name(listings),
+                     'organize_hotel_comparison': lambda: module.organize_hotel_comparison(grouped)}
+            if hasattr(module, 'normalize_hotel_name'):
+                cases['normalize_hotel_name'] = lambda: [module.normalize_hotel_name(name) for name in names]
+
+            for case, func in cases.items():
+                key = f"{target}:{case}:{size}"
+                result = _measure(func, repeat, reset)
+                result['listings_per_second'] = size / result['seconds'] if result['seconds'] else float('inf')
+                results[key] = result
+                print(f"{key:<55} {result['seconds'] * 1000:>10.2f} ms "
+                      f"{result['listings_per_second']:>14,.0f} listings/s "
+                      f"{result['peak_bytes'] / 1024 / 1024:>9.2f} MiB peak")
+    return results
+
+def check(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if result['seconds'] > baseline['seconds'] * (1 + tolerance):
+            regressions.append(f"{key}: {result['seconds'] * 1000:.2f} ms vs baseline {baseline['seconds'] * 1000:.2f} ms")
+        if result['peak_bytes'] > baseline['peak_bytes'] * (1 + tolerance):
+            regressions.append(f"{key}: {result['peak_bytes']:,} B peak vs baseline {baseline['peak_bytes']:,} B")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--noise', type=float, default=0.5, help='Probability of each kind of name noise')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true', help='Fail if slower or bigger than the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.noise, args.repeat, args.seed)
+
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baselines at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = check(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
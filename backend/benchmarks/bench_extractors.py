@@ -0,0 +1,186 @@
+"""
+Benchmarks for result-page parsing.
+
+Times the precompiled lxml extractors (app/scraper/extractors.py) against the
+parsel path the spiders used before them (wrap the page in an ``HtmlResponse``,
+then one ``.css(...).get()`` per field per card) on Booking.com and Agoda
+result pages, and checks that both produce the same listings.
+
+By default the pages are synthetic fixtures that mirror each site's card markup
+(scripts and filler included). Point ``--fixtures`` at a directory of saved pages
+named ``booking*.html`` / ``agoda*.html`` (optionally gzipped) to use real ones.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_extractors                       # 25 and 100 cards per page
+    python -m benchmarks.bench_extractors --cards 25 --repeat 20
+    python -m benchmarks.bench_extractors --fixtures path/to/pages
+"""
+import argparse
+import glob
+import gzip
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Tuple
+
+from scrapy.http import HtmlResponse
+
+from app.scraper.extractors import agoda_extractor, booking_extractor
+from app.scraper.items import HotelListing
+from benchmarks.bench_comparator import _measure, generate_listings
+
+BASE_URLS = {
+    'booking': 'https://www.booking.com/searchresults.html?ss=Dhaka',
+    'agoda': 'https://www.agoda.com/search?city=1390',
+}
+
+def parsel_booking(response) -> List[HotelListing]:
+    """The spider's former parsel card parser (without the search filters)."""
+    items = []
+    for hotel in response.css('[data-testid="property-card"]'):
+        try:
+            name = hotel.css('[data-testid="title"]::text').get()
+            price_text = hotel.css('[data-testid="price-and-discounted-price"]::text').get()
+            rating = len(hotel.css('[data-testid="rating-stars"] span').getall())
+            image = hotel.css('[data-testid="image"]::attr(src)').get()
+            booking_url = hotel.css('[data-testid="title-link"]::attr(href)').get()
+            price = float(price_text.replace('BDT', '').replace(',', '').strip())
+            items.append(HotelListing(hotel_name=name, price=price, rating=rating, image=image,
+                                      booking_url=response.urljoin(booking_url), source='booking.com'))
+        except Exception:
+            continue
+    return items
+
+def parsel_agoda(response) -> List[HotelListing]:
+    """The spider's former parsel card parser (without the search filters)."""
+    items = []
+    container = response.css('div#sort-bar + div')
+    for hotel in container.css('[data-selenium="hotel-item"]'):
+        try:
+            name = hotel.css('[data-selenium="hotel-name"]::text').get()
+            price_text = hotel.css('[data-selenium="display-price"]::text').get()
+            rating = len(hotel.css('[data-testid="rating-container"] svg').getall())
+            image = hotel.css('[data-element-name="ssrweb-mainphoto"] img::attr(src)').get()
+            booking_url = hotel.css('[data-element-name="property-card-content"]::attr(href)').get()
+            price = float(price_text.replace('BDT', '').replace(',', '').strip())
+            items.append(HotelListing(hotel_name=name, price=price, rating=rating, image=image,
+                                      booking_url=response.urljoin(booking_url), source='agoda'))
+        except Exception:
+            continue
+    return items
+
+PARSERS: Dict[str, Tuple[Callable, object]] = {
+    'booking': (parsel_booking, booking_extractor),
+    'agoda': (parsel_agoda, agoda_extractor),
+}
+
+def _filler(rng: random.Random, depth: int = 3) -> str:
+    if depth == 0:
+        return f'<span class="c{rng.randrange(10**6):06x}">{rng.choice(["Free cancellation", "Breakfast included", "Only 2 left", "Travel sustainable"])}</span>'
+    return f'<div class="c{rng.randrange(10**6):06x}">' + ''.join(_filler(rng, depth - 1) for _ in range(2)) + '</div>'
+
+def _page(head_size: int, body: str) -> str:
+    state = '{"props":' + ','.join(['{"k":"v"}'] * head_size) + '}'
+    return (f'<!DOCTYPE html><html><head><title>Results</title>'
+            f'<script>window.__STATE__ = [{state}];</script>'
+            f'<style>.a{{color:red}}</style></head><body>{body}</body></html>')
+
+def booking_fixture(cards: int, seed: int = 42) -> bytes:
+    rng = random.Random(seed)
+    listings = generate_listings(cards, seed=seed)
+    parts = ['<header>' + _filler(rng) + '</header><main>']
+    for i, listing in enumerate(listings):
+        stars = ''.join('<span><svg viewBox="0 0 24 24"><path d="M1 1"/></svg></span>' for _ in range(listing.rating))
+        parts.append(
+            f'<div data-testid="property-card" class="c82435a4b8">'
+            f'<div class="a"><a href="/hotel/bd/h{i}.html" data-testid="property-card-desktop-single-image">'
+            f'<img data-testid="image" src="https://cf.bstatic.com/xdata/images/hotel/square240/{i}.jpg" alt="" width="240"></a></div>'
+            f'<div class="b"><h3><a data-testid="title-link" href="/hotel/bd/h{i}.html?aid=304142&amp;checkin=2026-10-19">'
+            f'<div data-testid="title" class="f6431b446c">{listing.hotel_name.replace("&", "&amp;")}</div></a></h3>'
+            f'<div data-testid="rating-stars">{stars}</div>{_filler(rng)}'
+            f'<div data-testid="availability-rate-information"><span data-testid="price-and-discounted-price">BDT&nbsp;{listing.price:,.0f}</span></div>'
+            f'</div></div>'
+        )
+    parts.append('</main><footer>' + _filler(rng) + '</footer>')
+    return _page(cards * 20, ''.join(parts)).encode('utf-8')
+
+def agoda_fixture(cards: int, seed: int = 42) -> bytes:
+    rng = random.Random(seed)
+    listings = generate_listings(cards, seed=seed)
+
+    def card(i: int, listing: HotelListing) -> str:
+        stars = ''.join('<svg viewBox="0 0 12 12"><path d="M1 1"/></svg>' for _ in range(listing.rating))
+        return (
+            f'<li data-selenium="hotel-item" class="PropertyCard">'
+            f'<a data-element-name="property-card-content" href="/h{i}/hotel/dhaka-bd.html?checkIn=2026-10-19">'
+            f'<div data-element-name="ssrweb-mainphoto"><img src="//pix8.agoda.net/hotelImages/{i}.jpg" alt=""></div>'
+            f'<h3 data-selenium="hotel-name">{listing.hotel_name.replace("&", "&amp;")}</h3>'
+            f'<div data-testid="rating-container">{stars}</div>{_filler(rng)}'
+            f'<span data-selenium="display-price">{listing.price:,.0f}</span></a></li>'
+        )
+
+    # A "recently viewed" strip outside the result list must not be picked up
+    recent = ''.join(card(cards + i, listing) for i, listing in enumerate(listings[:3]))
+    results = ''.join(card(i, listing) for i, listing in enumerate(listings))
+    body = (f'<div class="recent"><ul>{recent}</ul></div>'
+            f'<div id="sort-bar">{_filler(rng)}</div><div><ol class="hotel-list-container">{results}</ol></div>')
+    return _page(cards * 20, body).encode('utf-8')
+
+FIXTURES = {'booking': booking_fixture, 'agoda': agoda_fixture}
+
+def load_fixtures(directory: str) -> List[Tuple[str, str, bytes]]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html*'))):
+        name = os.path.basename(path)
+        source = next((source for source in PARSERS if name.startswith(source)), None)
+        if source is None:
+            continue
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            pages.append((source, name, f.read()))
+    return pages
+
+def run(pages: List[Tuple[str, str, bytes]], repeat: int) -> bool:
+    identical = True
+    for source, name, body in pages:
+        parsel_parse, extractor = PARSERS[source]
+        url = BASE_URLS[source]
+
+        expected = parsel_parse(HtmlResponse(url, body=body, encoding='utf-8'))
+        actual = extractor.extract(body, url)
+        same = [item.to_dict() for item in expected] == [item.to_dict() for item in actual]
+        identical = identical and same
+
+        timings = {
+            'parsel': _measure(lambda: parsel_parse(HtmlResponse(url, body=body, encoding='utf-8')), repeat, lambda: None),
+            'lxml': _measure(lambda: extractor.extract(body, url), repeat, lambda: None),
+        }
+        for path, result in timings.items():
+            print(f"{source}:{name}:{path:<7} {len(actual):>5} cards {result['seconds'] * 1000:>9.2f} ms/page "
+                  f"{result['peak_bytes'] / 1024 / 1024:>7.2f} MiB peak")
+        speedup = timings['parsel']['seconds'] / timings['lxml']['seconds']
+        print(f"{source}:{name}: {speedup:.1f}x faster, results {'identical' if same else 'DIFFER'}")
+    return identical
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, nargs='+', default=[25, 100], help='Cards per synthetic page')
+    parser.add_argument('--fixtures', help='Directory of saved booking*/agoda* result pages')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        pages = load_fixtures(args.fixtures)
+        if not pages:
+            print(f"No booking*/agoda* pages in {args.fixtures}")
+            return 1
+    else:
+        pages = [(source, f'synthetic-{cards}', build(cards, args.seed))
+                 for cards in args.cards for source, build in FIXTURES.items()]
+
+    return 0 if run(pages, args.repeat) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
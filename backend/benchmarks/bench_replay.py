@@ -0,0 +1,118 @@
+"""
+End-to-end benchmark over recorded results pages.
+
+Replays every search captured under ``PAGE_CAPTURE_DIR`` (see
+app/scraper/captures.py) offline: the pages of each source are loaded from disk,
+parsed by that source's spider (``parse_cards``: extractor plus search filters)
+and the listings of all sources are compared, as the API does for a live search.
+No browser and no network are involved, so runs are deterministic.
+
+Record searches first by running the backend with
+``SCRAPER_CAPTURE_MODE=record`` (and ``SCRAPER_CAPTURE_DIR`` if the default
+``captures`` directory doesn't suit), then, from the backend directory:
+
+    python -m benchmarks.bench_replay
+    python -m benchmarks.bench_replay --captures path/to/captures --repeat 10
+    python -m benchmarks.bench_replay --save-baseline      # record baselines
+    python -m benchmarks.bench_replay --check              # exit 1 on regressions
+
+Baselines share benchmarks/baselines.json with bench_comparator (keys start
+with ``replay:``) and are machine specific.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from app.scraper.captures import iter_searches, load_page, search_key
+from app.scraper.settings import PAGE_CAPTURE_DIR
+from app.scraper.worker import SOURCES
+from benchmarks.bench_comparator import BASELINE_PATH, _measure, check
+from comparator import group_hotels_by_name, organize_hotel_comparison
+
+SPIDERS = {spider_cls.name: spider_cls for spider_cls in SOURCES.values()}
+
+def load_searches(directory: str) -> Dict[str, List[Tuple[Any, List[str]]]]:
+    """Recorded searches grouped by their parameters: key -> [(spider, page paths)]."""
+    searches = defaultdict(list)
+    for manifest, pages in iter_searches(directory):
+        spider_cls = SPIDERS.get(manifest['spider'])
+        if spider_cls is None or not pages:
+            continue
+        spider = spider_cls(**manifest['params'])
+        searches[search_key('search', manifest['params'])].append((spider, pages))
+    return searches
+
+def replay(spiders: List[Tuple[Any, List[Any]]]) -> List[Any]:
+    listings = []
+    for spider, responses in spiders:
+        for response in responses:
+            if response.status < 400:
+                listings.extend(spider.parse_cards(response))
+    return listings
+
+def run(directory: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for key, spiders in sorted(load_searches(directory).items()):
+        pages = sum(len(paths) for _, paths in spiders)
+        load = lambda: [(spider, [load_page(path) for path in paths]) for spider, paths in spiders]
+        loaded = load()
+        listings = replay(loaded)
+
+        cases = {
+            'load': load,
+            'parse': lambda: replay(loaded),
+            'compare': lambda: organize_hotel_comparison(group_hotels_by_name(listings)),
+            'total': lambda: organize_hotel_comparison(group_hotels_by_name(replay(load()))),
+        }
+        sources = ','.join(sorted(spider.name for spider, _ in spiders))
+        for case, func in cases.items():
+            name = f"replay:{key}:{case}"
+            result = _measure(func, repeat, lambda: None)
+            result['listings_per_second'] = len(listings) / result['seconds'] if result['seconds'] else float('inf')
+            results[name] = result
+            print(f"{name:<40} {sources:<14} {pages:>3} pages {len(listings):>6} listings "
+                  f"{result['seconds'] * 1000:>9.2f} ms {result['peak_bytes'] / 1024 / 1024:>7.2f} MiB peak")
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--captures', default=PAGE_CAPTURE_DIR, help='Directory of recorded searches')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true', help='Fail if slower or bigger than the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run(args.captures, args.repeat)
+    if not results:
+        print(f"No recorded searches in {args.captures}; record some with SCRAPER_CAPTURE_MODE=record")
+        return 1
+
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baselines at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = check(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
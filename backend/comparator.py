@@ -1,55 +1,161 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 from collections import defaultdict
-from fuzzywuzzy import fuzz
+from functools import lru_cache
 import re
 
+import numpy as np
+from rapidfuzz import fuzz, process
+from scipy import sparse
+
+if TYPE_CHECKING:
+    from app.scraper.items import HotelListing
+
+# Names scoring at least this (fuzz.ratio, rounded to an int) are the same hotel
+MATCH_THRESHOLD = 75
+
+STOPWORDS = frozenset({'hotel', 'dhaka', 'resort', 'inn', 'the'})
+_NON_LETTERS = re.compile(r'[^a-z\s]')
+
+# Unseen names are grouped this many at a time
+_CHUNK_SIZE = 256
+
+@lru_cache(maxsize=8192)
 def normalize_hotel_name(name: str) -> str:
     """
     Normalize hotel name by removing common words and formatting.
     """
-    name = name.lower()
-    name = re.sub(r'[^a-z\s]', '', name)  # Remove non-letter characters
-    words = name.split()
-    stopwords = {'hotel', 'dhaka', 'resort', 'inn', 'the'}
-    filtered_words = [word for word in words if word not in stopwords]
-    normalized_name = ' '.join(filtered_words)
-    return normalized_name.strip()
-
-def group_hotels_by_name(hotels: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    name = _NON_LETTERS.sub('', name.lower())  # Remove non-letter characters
+    filtered_words = [word for word in name.split() if word not in STOPWORDS]
+    return ' '.join(filtered_words)
+
+def _bigram_features(names: List[str]) -> sparse.csr_matrix:
+    """
+    Encode each name as a 0/1 row over (padded bigram, occurrence) features, so the
+    dot product of two rows is the size of their bigram multiset intersection.
+    """
+    vocabulary: Dict[tuple, int] = {}
+    indptr = [0]
+    indices = []
+    for name in names:
+        padded = f'\x02{name}\x03'
+        seen: Dict[str, int] = defaultdict(int)
+        for i in range(len(padded) - 1):
+            bigram = padded[i:i + 2]
+            seen[bigram] += 1
+            indices.append(vocabulary.setdefault((bigram, seen[bigram]), len(vocabulary)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(names), max(len(vocabulary), 1)))
+
+def _min_shared_bigrams(total_length: np.ndarray) -> np.ndarray:
+    """
+    Lower bound on shared padded bigrams for two names whose lengths add up to
+    ``total_length`` and that could still score MATCH_THRESHOLD.
+
+    fuzz.ratio is 200 * LCS / total_length, so a match needs LCS >= 0.3725 * total_length
+    (74.5 rounds up to 75 only if it is exceeded). Turning one name into the other
+    takes total_length - 2 * LCS insertions/deletions, and each of those breaks at
+    most one of the LCS's LCS + 1 padded bigrams, which leaves at least
+    3 * LCS + 1 - total_length bigrams in common. Pairs below this bound cannot
+    match and are skipped without being scored.
+    """
+    min_lcs = np.ceil((MATCH_THRESHOLD - 0.5) / 200 * total_length - 1e-9)
+    return np.maximum(3 * min_lcs + 1 - total_length, 1)
+
+def _is_match(scores: np.ndarray) -> np.ndarray:
+    # Same as round(score) >= MATCH_THRESHOLD, with round-half-to-even
+    return scores > MATCH_THRESHOLD - 0.5
+
+def _assign_groups(names: List[str]) -> List[int]:
+    """
+    Assign each distinct normalized name (in first-seen order) to a group index.
+
+    A name joins the earliest group whose representative (the name that opened it)
+    scores MATCH_THRESHOLD or more, and opens a new group otherwise. Names are
+    processed in chunks: a bigram index prunes representatives that cannot match,
+    the rest are scored with one ``process.cdist`` call per chunk, and only the
+    chunk's own new groups are resolved sequentially.
+    """
+    features = _bigram_features(names)
+    lengths = np.fromiter((len(name) for name in names), dtype=np.int64, count=len(names))
+    assignment = [-1] * len(names)
+    rep_rows: List[int] = []  # Row of each group's representative name
+
+    for start in range(0, len(names), _CHUNK_SIZE):
+        rows = range(start, min(start + _CHUNK_SIZE, len(names)))
+        chunk = [names[row] for row in rows]
+        first_match = np.full(len(chunk), -1, dtype=np.int64)
+
+        # Earliest existing group each name matches
+        if rep_rows:
+            reps = np.asarray(rep_rows)
+            shared = (features[rows.start:rows.stop] @ features[reps].T).tocoo()
+            total_length = lengths[rows.start + shared.row] + lengths[reps[shared.col]]
+            candidates = np.unique(shared.col[shared.data >= _min_shared_bigrams(total_length)])
+            if len(candidates):
+                scores = process.cdist(
+                    chunk, [names[rep_rows[group]] for group in candidates],
+                    scorer=fuzz.ratio, score_cutoff=MATCH_THRESHOLD - 0.5,
+                    dtype=np.float64, workers=-1
+                )
+                matched = _is_match(scores)
+                has_match = matched.any(axis=1)
+                first_match[has_match] = candidates[matched[has_match].argmax(axis=1)]
+
+        # The rest may still match a group opened earlier in this same chunk
+        within = _is_match(process.cdist(
+            chunk, chunk, scorer=fuzz.ratio, score_cutoff=MATCH_THRESHOLD - 0.5,
+            dtype=np.float64, workers=-1
+        ))
+        opened_here = np.zeros(len(chunk), dtype=bool)
+        for i, row in enumerate(rows):
+            if first_match[i] >= 0:
+                assignment[row] = int(first_match[i])
+                continue
+            hits = within[i] & opened_here
+            j = int(hits.argmax())
+            if hits[j]:
+                assignment[row] = assignment[rows.start + j]
+            else:
+                assignment[row] = len(rep_rows)
+                rep_rows.append(row)
+                opened_here[i] = True
+
+    return assignment
+
+def group_hotels_by_name(hotels: List['HotelListing']) -> Dict[str, List['HotelListing']]:
     """
     Group hotels by their fuzzy-matched names.
+
+    Each hotel joins the first group (in order of creation) whose representative
+    name scores at least MATCH_THRESHOLD against its normalized name.
     """
-    grouped_hotels = []
-    
+    # Every occurrence of a normalized name lands in the same group, so each
+    # distinct name only has to be matched once
+    name_rows: Dict[str, int] = {}
+    hotel_rows = []
     for hotel in hotels:
-        raw_name = hotel.get('hotel_name', '')
-        normalized_name = normalize_hotel_name(raw_name)
-        
+        normalized_name = hotel.normalized_name
         if not normalized_name:
+            hotel_rows.append(-1)
             continue
+        hotel_rows.append(name_rows.setdefault(normalized_name, len(name_rows)))
 
-        matched_group = None
-        
-        for group in grouped_hotels:
-            representative_name = group['name']
-            similarity = fuzz.ratio(normalized_name, representative_name)
-            if similarity >= 75:  # threshold for considering names as similar
-                matched_group = group
-                break
-        
-        if matched_group:
-            matched_group['hotels'].append(hotel)
-        else:
-            grouped_hotels.append({'name': normalized_name, 'hotels': [hotel]})
-    
-    # Convert to the final dictionary format
-    result = {}
-    for group in grouped_hotels:
-        result[group['name']] = group['hotels']
-    
-    return result
+    names = list(name_rows)
+    assignment = _assign_groups(names) if names else []
+
+    grouped_hotels: Dict[int, List['HotelListing']] = {}
+    group_names: Dict[int, str] = {}
+    for row, name in enumerate(names):
+        group_names.setdefault(assignment[row], name)
+    for hotel, row in zip(hotels, hotel_rows):
+        if row >= 0:
+            grouped_hotels.setdefault(assignment[row], []).append(hotel)
+
+    # Convert to the final dictionary format, in order of group creation
+    return {group_names[group]: grouped_hotels[group] for group in sorted(grouped_hotels)}
 
-def organize_hotel_comparison(grouped_hotels: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+def organize_hotel_comparison(grouped_hotels: Dict[str, List['HotelListing']]) -> List[Dict[str, Any]]:
     """
     Organize hotel data for comparison, finding the best deals across sources.
     
@@ -66,10 +172,10 @@ def organize_hotel_comparison(grouped_hotels: Dict[str, List[Dict[str, Any]]]) -
             continue
             
         # Find the best price among all sources
-        best_price = min(hotel['price'] for hotel in hotels)
+        best_price = min(hotel.price for hotel in hotels)
         
         # Use the most complete name as the display name
-        display_name = max(hotels, key=lambda x: len(x['hotel_name']))['hotel_name']
+        display_name = max(hotels, key=lambda x: len(x.hotel_name)).hotel_name
         
         # Create comparison entry
         comparison_entry = {
@@ -81,12 +187,12 @@ def organize_hotel_comparison(grouped_hotels: Dict[str, List[Dict[str, Any]]]) -
         # Add data from each source
         for hotel in hotels:
             source_data = {
-                'source': hotel.get('source', 'unknown'),
-                'price': hotel.get('price', 0),
-                'rating': hotel.get('rating', 0),
-                'image': hotel.get('image', ''),
-                'booking_url': hotel.get('booking_url', ''),
-                'is_best_deal': hotel.get('price', 0) == best_price
+                'source': hotel.source,
+                'price': hotel.price,
+                'rating': hotel.rating,
+                'image': hotel.image,
+                'booking_url': hotel.booking_url,
+                'is_best_deal': hotel.price == best_price
             }
             comparison_entry['sources'].append(source_data)
         
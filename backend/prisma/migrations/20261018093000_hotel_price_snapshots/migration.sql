@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "hotel_price_snapshots" (
+    "id" SERIAL NOT NULL,
+    "source" TEXT NOT NULL,
+    "hotel_name" TEXT NOT NULL,
+    "normalized_name" TEXT NOT NULL,
+    "price" DOUBLE PRECISION NOT NULL,
+    "rating" DOUBLE PRECISION NOT NULL,
+    "image" TEXT,
+    "booking_url" TEXT NOT NULL,
+    "city" TEXT NOT NULL,
+    "check_in" DATE NOT NULL,
+    "check_out" DATE NOT NULL,
+    "scraped_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "hotel_price_snapshots_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "hotel_price_snapshots_city_check_in_idx" ON "hotel_price_snapshots"("city", "check_in");
+
+-- CreateIndex
+CREATE INDEX "hotel_price_snapshots_normalized_name_idx" ON "hotel_price_snapshots"("normalized_name");
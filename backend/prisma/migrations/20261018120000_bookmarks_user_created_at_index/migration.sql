@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "bookmarks_user_id_created_at_id_idx" ON "bookmarks"("user_id", "created_at", "id");
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "users" ADD COLUMN "bookmarks_version" INTEGER NOT NULL DEFAULT 0;
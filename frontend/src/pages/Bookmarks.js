@@ -5,29 +5,42 @@ const Bookmarks = () => {
   const [bookmarks, setBookmarks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Fetches one page of bookmarks; the cursor for the next page comes back in
+  // the X-Next-Cursor header and is absent on the last page
+  const fetchBookmarksPage = async (cursor) => {
+    const token = localStorage.getItem('token');
+    if (!token) {
+      throw new Error('No authentication token found');
+    }
 
-  useEffect(() => {
-    const fetchBookmarks = async () => {
-      try {
-        const token = localStorage.getItem('token');
-        if (!token) {
-          throw new Error('No authentication token found');
-        }
+    const url = cursor
+      ? `http://localhost:8000/bookmarks?cursor=${encodeURIComponent(cursor)}`
+      : 'http://localhost:8000/bookmarks';
+    const response = await fetch(url, {
+      headers: { 
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json'
+      }
+    });
 
-        const response = await fetch('http://localhost:8000/bookmarks', {
-          headers: { 
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json'
-          }
-        });
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch bookmarks');
+    }
 
-        if (!response.ok) {
-          const error = await response.json();
-          throw new Error(error.detail || 'Failed to fetch bookmarks');
-        }
+    const data = await response.json();
+    return { data, cursor: response.headers.get('X-Next-Cursor') };
+  };
 
-        const data = await response.json();
-        setBookmarks(data);
+  useEffect(() => {
+    const fetchBookmarks = async () => {
+      try {
+        const page = await fetchBookmarksPage(null);
+        setBookmarks(page.data);
+        setNextCursor(page.cursor);
       } catch (err) {
         console.error('Fetch bookmarks error:', err);
         setError(err.message || 'Failed to fetch bookmarks');
@@ -39,6 +52,20 @@ const Bookmarks = () => {
     fetchBookmarks();
   }, []);
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchBookmarksPage(nextCursor);
+      setBookmarks((current) => [...current, ...page.data]);
+      setNextCursor(page.cursor);
+    } catch (err) {
+      console.error('Fetch bookmarks error:', err);
+      setError(err.message || 'Failed to fetch bookmarks');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRemoveBookmark = async (bookmarkId) => {
     try {
       const token = localStorage.getItem('token');
@@ -144,6 +171,18 @@ const Bookmarks = () => {
           </div>
         )}
 
+        {!loading && nextCursor && (
+          <div className="mt-8 flex justify-center">
+            <button
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              className="inline-flex items-center px-4 py-2 border border-transparent text-sm font-medium rounded-md text-white bg-indigo-600 hover:bg-indigo-700 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </button>
+          </div>
+        )}
+
         {!loading && bookmarks.length === 0 && (
           <div className="text-center py-12">
             <h3 className="text-lg font-medium text-gray-900">No bookmarks yet</h3>
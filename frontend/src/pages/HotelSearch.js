@@ -36,18 +36,17 @@ const HotelSearch = () => {
       const maxPriceNum = maxPrice ? parseInt(maxPrice) : null;
       const ratingNum = rating ? parseInt(rating) : null;
 
-      const response = await fetch('http://localhost:8000/search', {
-        method: 'POST',
+      // A GET, so the browser caches the result and revalidates it with the
+      // ETag (If-None-Match) when the same search is repeated
+      const params = new URLSearchParams({ city: city });
+      if (minPriceNum !== null) params.append('min_price', minPriceNum);
+      if (maxPriceNum !== null) params.append('max_price', maxPriceNum);
+      if (ratingNum !== null) params.append('star_rating', ratingNum);
+
+      const response = await fetch(`http://localhost:8000/search?${params}`, {
         headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({
-          city: city,
-          min_price: minPriceNum,
-          max_price: maxPriceNum,
-          star_rating: ratingNum
-        })
+          'Authorization': `Bearer ${token}`
+        }
       });
 
       if (!response.ok) {